@@ -0,0 +1,278 @@
+#Benchmark suite for the simulation engines.
+#Measures TwoQueueSimulation.run throughput across traffic loads for both
+#strategies, peak memory per million packets, run_multiple_simulations
+#scaling with worker count, end-to-end generate_all_plots time, and the
+#import time of the main modules in a fresh interpreter. Every run uses fixed
+#seeds and the result cache is switched off. Results are appended to a JSON
+#history, and the run fails when throughput drops more than --threshold below
+#the median of the last comparable records, when an import exceeds its
+#startup budget, or when a module pulls in matplotlib or tkinter at import.
+#A run with throughput regressions is not recorded unless --record is given,
+#so rerunning a slow build cannot make it the new baseline.
+#
+#   python benchmarks/run_benchmarks.py            full suite
+#   python benchmarks/run_benchmarks.py --quick    smaller sizes, for a quick check
+#   python benchmarks/run_benchmarks.py --only throughput --engine calendar
+#   python benchmarks/run_benchmarks.py --only startup
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ['QUEUE_SIM_CACHE'] = '0'  # always measure simulation, never cache hits
+
+from queue_simulation import engine_class, run_multiple_simulations  # noqa: E402
+
+
+HISTORY = os.path.join(ROOT, 'benchmarks', 'history.json')
+RHOS = (0.1, 0.5, 0.9, 1.5)
+STRATEGIES = ('random', 'min_queue')
+SEED = 12345
+SERVICE_RATE = 1.0
+
+SIZES = {
+    # name: (packets per throughput run, repeats, packets for memory, scaling runs, scaling packets, plot runs, plot packets)
+    'full': (200000, 3, 1000000, 16, 50000, 10, 10000),
+    'quick': (50000, 2, 200000, 8, 10000, 3, 2000)
+}
+
+# Import-time budgets in ms: cumulative import time of each module in a fresh
+# interpreter, and for 'main.py help' the wall time over a bare interpreter.
+# Every sweep worker pays the sweep import, so it is kept close to NumPy's own.
+STARTUP_BUDGET_MS = {
+    'main.py help': 50,
+    'queue_simulation': 250,
+    'sweep': 300,
+    'plotting': 300,
+    'response_surface': 300,
+    'sensitivity_gui': 350
+}
+# Never loaded by importing any module above; only drawing a figure or
+# opening the window may import them
+DEFERRED_MODULES = ('matplotlib', 'tkinter')
+STARTUP_REPEATS = 5
+# Throughput baseline: per-entry median of this many comparable records
+BASELINE_RECORDS = 5
+
+
+def bench_throughput(engine, num_packets, repeats):
+    # Events per second (arrivals + departures) per (strategy, ρ), best of `repeats`
+    results = {}
+    for strategy in STRATEGIES:
+        for rho in RHOS:
+            arrival_rate = 2 * rho * SERVICE_RATE
+            best = None
+            for _ in range(repeats):
+                sim = engine_class(engine)(arrival_rate, SERVICE_RATE, strategy=strategy, seed=SEED)
+                start = time.perf_counter()
+                metrics = sim.run(num_packets=num_packets)
+                elapsed = time.perf_counter() - start
+                events = metrics['packets_offered'] + metrics['packets_departed']
+                best = max(best or 0.0, events / elapsed)
+            results[f'{strategy}/rho={rho}'] = round(best, 1)
+    return results
+
+
+def bench_memory(engine, num_packets):
+    # Peak traced Python memory of one run, scaled to bytes per million packets
+    results = {}
+    for strategy in STRATEGIES:
+        sim = engine_class(engine)(2 * 0.9 * SERVICE_RATE, SERVICE_RATE, strategy=strategy, seed=SEED)
+        tracemalloc.start()
+        sim.run(num_packets=num_packets)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[strategy] = round(peak * 1e6 / num_packets)
+    return results
+
+
+def bench_scaling(engine, num_runs, num_packets):
+    # Wall time of run_multiple_simulations for 1, 2, 4, ... workers up to the core count
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, cores} | {w for w in (2, 4, 8, 16, 32) if w < cores})
+    results = {}
+    for workers in worker_counts:
+        start = time.perf_counter()
+        run_multiple_simulations(2 * 0.9 * SERVICE_RATE, SERVICE_RATE, 'min_queue', num_runs=num_runs,
+                                 num_packets=num_packets, engine=engine, workers=workers, cache=False)
+        results[str(workers)] = round(time.perf_counter() - start, 3)
+    return results
+
+
+def bench_plots(num_runs, num_packets):
+    # End-to-end generate_all_plots into a scratch directory
+    from plotting import generate_all_plots
+    with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        generate_all_plots(num_runs=num_runs, num_packets=num_packets, output_dir=output_dir)
+        elapsed = time.perf_counter() - start
+    return {'seconds': round(elapsed, 3)}
+
+
+def _import_time(module):
+    # (cumulative import time in ms, deferred modules it loaded), via -X importtime
+    code = f"import sys, {module}; print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True,
+                          text=True, check=True)
+    cumulative = None
+    for line in proc.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            cumulative = int(fields[1]) / 1000
+    loaded = [m for m in proc.stdout.strip().split(',') if m]
+    return cumulative, loaded
+
+
+def _wall_time(args):
+    start = time.perf_counter()
+    subprocess.run(args, cwd=ROOT, capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def bench_startup(repeats=STARTUP_REPEATS):
+    # Best-of-`repeats` import times against STARTUP_BUDGET_MS.
+    # Returns (results, problems), problems being human-readable failures.
+    results = {}
+    problems = []
+    for target, budget in STARTUP_BUDGET_MS.items():
+        if target == 'main.py help':
+            bare = min(_wall_time([sys.executable, '-c', 'pass']) for _ in range(repeats))
+            best = min(_wall_time([sys.executable, 'main.py', 'help']) for _ in range(repeats)) - bare
+            best *= 1000
+        else:
+            best = None
+            for _ in range(repeats):
+                elapsed, loaded = _import_time(target)
+                best = elapsed if best is None else min(best, elapsed)
+                if loaded:
+                    problems.append(f"importing {target} loads {', '.join(loaded)}")
+                    break
+        results[target] = round(best, 1)
+        if best > budget:
+            problems.append(f"{target}: {best:.1f} ms exceeds the {budget} ms budget")
+    return results, sorted(set(problems))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path=HISTORY):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def _comparable(a, b):
+    # Same hardware, engine and packet count
+    return all(a.get(key) == b.get(key) for key in ('machine', 'processor', 'cpu_count', 'engine', 'packets'))
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+def check_regressions(record, history, threshold):
+    # Throughput entries more than `threshold` (a fraction) below the median of
+    # the last BASELINE_RECORDS comparable records
+    if 'throughput' not in record['results']:
+        return []
+    previous = [r['results']['throughput'] for r in history
+                if 'throughput' in r['results'] and _comparable(r, record)][-BASELINE_RECORDS:]
+    regressions = []
+    for name, value in record['results']['throughput'].items():
+        values = [p[name] for p in previous if name in p]
+        if values:
+            baseline = _median(values)
+            if value < (1 - threshold) * baseline:
+                regressions.append((name, baseline, value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the two-queue simulation engines")
+    parser.add_argument('--quick', action='store_true', help="smaller sizes for a quick check")
+    parser.add_argument('--engine', default='event', help="engine for throughput, memory and scaling (default: event)")
+    parser.add_argument('--only', action='append', choices=('throughput', 'memory', 'scaling', 'plots', 'startup'),
+                        help="run only these benchmarks (repeatable)")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="fail if throughput drops by more than this fraction (default: 0.15)")
+    parser.add_argument('--history', default=HISTORY, help="JSON history file")
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument('--no-record', action='store_true', help="compare against history without appending")
+    recording.add_argument('--record', action='store_true',
+                           help="append to history even when throughput regressed (accept a new baseline)")
+    args = parser.parse_args(argv)
+
+    size = 'quick' if args.quick else 'full'
+    packets, repeats, memory_packets, scaling_runs, scaling_packets, plot_runs, plot_packets = SIZES[size]
+    selected = args.only or ['throughput', 'memory', 'scaling', 'plots', 'startup']
+
+    results = {}
+    startup_problems = []
+    if 'throughput' in selected:
+        results['throughput'] = bench_throughput(args.engine, packets, repeats)
+    if 'memory' in selected:
+        results['memory_bytes_per_million_packets'] = bench_memory(args.engine, memory_packets)
+    if 'scaling' in selected:
+        results['scaling_seconds_by_workers'] = bench_scaling(args.engine, scaling_runs, scaling_packets)
+    if 'plots' in selected:
+        results['generate_all_plots'] = bench_plots(plot_runs, plot_packets)
+    if 'startup' in selected:
+        results['startup_ms'], startup_problems = bench_startup()
+
+    record = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'commit': _git_commit(),
+        'machine': platform.node(),
+        'processor': platform.processor() or platform.machine(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'size': size,
+        'packets': packets,
+        'engine': args.engine,
+        'seed': SEED,
+        'results': results
+    }
+    print(json.dumps(record, indent=2))
+
+    history = load_history(args.history)
+    regressions = check_regressions(record, history, args.threshold)
+    if args.record or not (args.no_record or regressions):
+        history.append(record)
+        with open(args.history, 'w') as f:
+            json.dump(history, f, indent=2)
+
+    if regressions:
+        print(f"\nThroughput regressions beyond {args.threshold:.0%} (against the median of the last "
+              f"{BASELINE_RECORDS} comparable records):")
+        for name, before, after in regressions:
+            print(f"  {name}: {before:,.0f} -> {after:,.0f} events/s ({after / before - 1:+.1%})")
+        if not args.record:
+            print("Not recorded; rerun with --record to accept this as the new baseline.")
+    if startup_problems:
+        print("\nStartup budget failures:")
+        for problem in startup_problems:
+            print(f"  {problem}")
+    return 1 if regressions or startup_problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,390 @@
+#Distributed execution across machines over TCP, standard library only.
+#ClusterExecutor is a concurrent.futures.Executor whose tasks run on worker
+#processes that connect to it from any machine, so it plugs in wherever the
+#simulation code takes an executor (run_multiple_simulations, execute_plan,
+#generate_all_plots, `main.py sweep --listen`). Tasks are sent as pickles of
+#(function, arguments), e.g. sweep.run_task with one (λ, μ, strategy, seed)
+#task, and each result (a metrics row) streams back as soon as it is done.
+#
+#Connections use multiprocessing.connection, which frames the messages and
+#authenticates both ends with a shared key (HMAC), so only holders of the key
+#can submit or run code. Each worker runs one task at a time and sends
+#heartbeats while busy. A task whose worker disconnects or stops sending
+#heartbeats is put back at the front of the queue and retried elsewhere, up
+#to max_retries times. Exceptions raised by a task are not retried.
+#
+#LocalCluster starts the coordinator on localhost together with worker
+#processes, as a stand-in for a real cluster in tests and on one machine.
+#
+#   python cluster.py worker HOST:PORT [--processes N]    join a coordinator
+
+import argparse
+import collections
+import functools
+import itertools
+import os
+import pickle
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Executor, Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+
+DEFAULT_PORT = 5320
+KEY_VARIABLE = 'QUEUE_SIM_CLUSTER_KEY'   # shared secret of coordinator and workers
+HEARTBEAT_INTERVAL = 5.0     # seconds between heartbeats from a busy worker
+HEARTBEAT_TIMEOUT = 30.0     # a busy worker silent for this long is treated as dead
+
+
+def parse_address(text, default_host='0.0.0.0'):
+    # 'host:port', 'host' or ':port' -> (host, port)
+    host, _, port = text.rpartition(':') if ':' in text else (text, '', '')
+    return (host or default_host, int(port) if port else DEFAULT_PORT)
+
+
+def _authkey(key):
+    # Shared key as bytes, from the argument or the environment
+    key = key or os.environ.get(KEY_VARIABLE)
+    if not key:
+        raise ValueError(f"A cluster key is required: pass authkey or set {KEY_VARIABLE}")
+    return key.encode() if isinstance(key, str) else key
+
+
+def _run_chunk(fn, chunk):
+    # Several calls in one message, for map(chunksize=...)
+    return [fn(*args) for args in chunk]
+
+
+def _chunks(iterables, chunksize):
+    iterator = zip(*iterables)
+    while True:
+        chunk = tuple(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _WorkItem:
+
+    def __init__(self, future, fn, args, kwargs):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = 0
+
+
+class ClusterExecutor(Executor):
+
+    # Coordinator: listens on address for workers and hands each one task at a time.
+    # address defaults to every interface on DEFAULT_PORT; port 0 picks a free port
+    # (see .address). authkey defaults to the QUEUE_SIM_CLUSTER_KEY variable.
+    # max_workers is the expected number of worker processes; callers size
+    # their chunks from it. Left as None, they send one task per replication.
+
+    def __init__(self, address=('0.0.0.0', DEFAULT_PORT), authkey=None, max_retries=3,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT, max_workers=None):
+        self.authkey = _authkey(authkey)
+        self._max_workers = max_workers
+        self.max_retries = max_retries
+        self.heartbeat_timeout = heartbeat_timeout
+        self._listener = Listener(address, authkey=self.authkey)
+        self.address = self._listener.address
+
+        self._condition = threading.Condition()
+        self._queue = collections.deque()
+        self._outstanding = 0     # submitted futures not yet finished
+        self._shutdown = False
+        self._closed = False
+        self._handlers = []
+        self.connected_workers = 0
+        self.retried_tasks = 0
+
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    @property
+    def max_workers(self):
+        # Tasks that can run at once, or None when the cluster size is unknown
+        if self._max_workers is None:
+            return None
+        return max(self._max_workers, self.connected_workers)
+
+    # Executor interface
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot submit to a cluster executor after shutdown")
+            self._queue.append(_WorkItem(future, fn, args, kwargs))
+            self._outstanding += 1
+            self._condition.notify()
+        return future
+
+    def map(self, fn, *iterables, timeout=None, chunksize=1):
+        # Like ProcessPoolExecutor.map: chunksize > 1 sends calls in batches
+        if chunksize <= 1:
+            return super().map(fn, *iterables, timeout=timeout)
+        results = super().map(functools.partial(_run_chunk, fn), _chunks(iterables, chunksize), timeout=timeout)
+        return itertools.chain.from_iterable(results)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        # Stop accepting tasks; workers are released once every submitted task is done
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                while self._queue:
+                    item = self._queue.popleft()
+                    if item.attempts == 0 and item.future.cancel():
+                        self._outstanding -= 1
+                    else:
+                        self._queue.appendleft(item)
+                        break
+            self._condition.notify_all()
+        if wait:
+            self._close()
+        else:
+            threading.Thread(target=self._close, daemon=True).start()
+
+    # Coordinator internals
+
+    def _close(self):
+        with self._condition:
+            while self._outstanding:
+                self._condition.wait()
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        # Wake the accept loop with a bare TCP connection (no handshake, so
+        # nothing can block on it), then release every worker
+        host, port = self.address
+        try:
+            socket.create_connection(('127.0.0.1' if host == '0.0.0.0' else host, port), timeout=5).close()
+        except OSError:
+            pass
+        self._accept_thread.join(timeout=5)
+        self._listener.close()
+        for handler in self._handlers:
+            handler.join()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                if self._closed:
+                    return
+                continue  # failed handshake, e.g. a wrong key
+            if self._closed:
+                connection.close()
+                return
+            handler = threading.Thread(target=self._serve_worker, args=(connection,), daemon=True)
+            handler.start()
+            self._handlers.append(handler)
+
+    def _next_item(self):
+        # Block until a task is available; None once the executor is closed
+        with self._condition:
+            while True:
+                while self._queue:
+                    item = self._queue.popleft()
+                    if item.attempts or item.future.set_running_or_notify_cancel():
+                        return item
+                    self._outstanding -= 1   # cancelled while queued
+                    self._condition.notify_all()
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+    def _finish(self, item, result=None, exception=None):
+        if exception is not None:
+            item.future.set_exception(exception)
+        else:
+            item.future.set_result(result)
+        with self._condition:
+            self._outstanding -= 1
+            self._condition.notify_all()
+
+    def _retry(self, item):
+        # The worker running item was lost: requeue it, or give up after max_retries
+        item.attempts += 1
+        if item.attempts > self.max_retries:
+            self._finish(item, exception=RuntimeError(
+                f"task {getattr(item.fn, '__name__', item.fn)} lost {item.attempts} workers; giving up"))
+            return
+        with self._condition:
+            self.retried_tasks += 1
+            self._queue.appendleft(item)
+            self._condition.notify()
+
+    def _serve_worker(self, connection):
+        # One thread per connected worker: send a task, wait for its result, repeat
+        with self._condition:
+            self.connected_workers += 1
+        item = None
+        try:
+            while True:
+                item = self._next_item()
+                if item is None:
+                    connection.send(('stop',))
+                    return
+                try:
+                    payload = pickle.dumps(('task', item.fn, item.args, item.kwargs))
+                except Exception as exc:
+                    self._finish(item, exception=exc)
+                    item = None
+                    continue
+                connection.send_bytes(payload)
+
+                while True:
+                    if not connection.poll(self.heartbeat_timeout):
+                        raise TimeoutError("worker stopped sending heartbeats")
+                    reply = connection.recv_bytes()
+                    try:
+                        message = pickle.loads(reply)
+                    except Exception as exc:
+                        # The reply arrived but cannot be rebuilt here (e.g. a class the
+                        # coordinator cannot import): a task failure, not a lost worker
+                        message = ('error', exc)
+                    if message[0] != 'heartbeat':
+                        break
+                kind, value = message
+                if kind == 'result':
+                    self._finish(item, result=value)
+                else:
+                    self._finish(item, exception=value)
+                item = None
+        except (OSError, EOFError, TimeoutError):
+            pass
+        finally:
+            connection.close()
+            with self._condition:
+                self.connected_workers -= 1
+            if item is not None:
+                self._retry(item)
+
+
+class LocalCluster(ClusterExecutor):
+
+    # A coordinator on localhost plus `workers` worker processes started with
+    # `python cluster.py worker`, exactly as on remote machines. The processes
+    # are in .processes and are reaped (or killed) once the executor closes,
+    # whether shutdown waits or not.
+
+    def __init__(self, workers=None, authkey=None, **kwargs):
+        workers = workers or os.cpu_count() or 1
+        super().__init__(('127.0.0.1', 0), authkey=authkey or secrets.token_hex(16), max_workers=workers, **kwargs)
+        host, port = self.address
+        env = dict(os.environ, **{KEY_VARIABLE: self.authkey.decode()})
+        script = os.path.abspath(__file__)
+        self.processes = [
+            subprocess.Popen([sys.executable, script, 'worker', f'{host}:{port}'], env=env,
+                             cwd=os.path.dirname(script))
+            for _ in range(workers)
+        ]
+
+    def _close(self):
+        super()._close()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+# Worker
+
+def _connect(address, authkey, timeout):
+    # Connect, retrying until the coordinator is up or timeout passes
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return Client(address, authkey=authkey)
+        except ConnectionRefusedError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def serve(address, authkey=None, connect_timeout=60.0, heartbeat_interval=HEARTBEAT_INTERVAL):
+
+    # Worker loop: run tasks from the coordinator at address until it says stop
+    # or goes away. Returns the number of tasks run.
+
+    connection = _connect(address, _authkey(authkey), connect_timeout)
+    send_lock = threading.Lock()
+    busy = threading.Event()
+    stopped = threading.Event()
+
+    def heartbeat():
+        while not stopped.wait(heartbeat_interval):
+            if busy.is_set():
+                with send_lock:
+                    try:
+                        connection.send(('heartbeat',))
+                    except OSError:
+                        return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    tasks_run = 0
+    try:
+        while True:
+            try:
+                payload = connection.recv_bytes()
+            except (EOFError, OSError):
+                break
+            busy.set()
+            try:
+                message = pickle.loads(payload)
+                if message[0] == 'stop':
+                    break
+                _, fn, args, kwargs = message
+                reply = ('result', fn(*args, **kwargs))
+            except Exception as exc:
+                reply = ('error', exc)
+            finally:
+                busy.clear()
+            tasks_run += 1
+
+            with send_lock:
+                try:
+                    connection.send(reply)
+                except (pickle.PicklingError, TypeError, AttributeError) as exc:
+                    connection.send(('error', RuntimeError(f"result could not be sent back: {exc!r}")))
+    finally:
+        stopped.set()
+        connection.close()
+    return tasks_run
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='cluster.py', description="Join a coordinator as a worker")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    worker = subparsers.add_parser('worker', help="run tasks for the coordinator at HOST:PORT")
+    worker.add_argument('address', help=f"coordinator HOST:PORT (default port {DEFAULT_PORT})")
+    worker.add_argument('--processes', type=int, default=1, help="worker processes on this machine")
+    worker.add_argument('--connect-timeout', type=float, default=60.0,
+                        help="seconds to keep retrying while the coordinator is not up yet")
+    args = parser.parse_args(argv)
+
+    address = parse_address(args.address, default_host='127.0.0.1')
+    if args.processes <= 1:
+        serve(address, connect_timeout=args.connect_timeout)
+        return
+    processes = [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker', args.address,
+                                   '--connect-timeout', str(args.connect_timeout)])
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+#Common random numbers for comparing the Random and Min-Queue strategies.
+#Both strategies in a replication see the same arrival times and the same
+#per-packet service requirements; dispatch coin flips come from a separate
+#stream, so the noise they share cancels in the paired difference.
+
+import math
+
+import numpy as np
+
+from precision import t_quantile
+from queue_simulation import CalendarTwoQueueSimulation, RandomStreams, RingBufferQueue, replication_seed
+
+
+COMPARED_METRICS = ('blocking_probability', 'average_queue_length', 'average_sojourn_time')
+
+
+class InversionStreams(RandomStreams):
+    # Random streams whose exponentials come from uniforms by inversion,
+    # E = -log(1 - U). With antithetic=True every uniform U is replaced by
+    # 1 - U, giving the negatively correlated twin of the same seed.
+
+    def __init__(self, seed=None, block_size=4096, antithetic=False):
+        super().__init__(seed, block_size)
+        self.antithetic = antithetic
+
+    def _uniform_array(self):
+        block = self.generator.random(self.block_size)
+        if self.antithetic:
+            block = 1.0 - block
+        return block
+
+    def _exponential_array(self):
+        block = self.generator.random(self.block_size)
+        if not self.antithetic:
+            block = 1.0 - block
+        # block is in (0, 1], so the log is finite
+        return -np.log(block)
+
+
+class CoupledTwoQueueSimulation(CalendarTwoQueueSimulation):
+    # Calendar engine with one random stream per source of randomness.
+    # Interarrival times, service requirements and dispatch choices each have
+    # their own stream, and a packet's service requirement is drawn when it
+    # arrives (blocked or not), so the n-th packet has the same arrival time
+    # and work under every strategy that shares the seed.
+
+    def __init__(self, arrival_rate, service_rate, strategy='random', seed=None, queue_capacity=10,
+                 antithetic=False):
+        super().__init__(arrival_rate, service_rate, strategy=strategy, seed=seed,
+                         queue_capacity=queue_capacity)
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        # Child seeds built explicitly: seed.spawn() would give different
+        # children each time the same seed is reused for another strategy
+        arrival_seed, service_seed, dispatch_seed = (
+            np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (k,)) for k in range(3))
+        self.arrival_streams = InversionStreams(arrival_seed, antithetic=antithetic)
+        self.service_streams = InversionStreams(service_seed, antithetic=antithetic)
+        self.dispatch_streams = InversionStreams(dispatch_seed, antithetic=antithetic)
+        # Service requirements of queued packets, in the same order as arrival times
+        self.demands = (RingBufferQueue(queue_capacity, 0), RingBufferQueue(queue_capacity, 1))
+
+    def run(self, num_packets=10000):
+        #Run simulation for specified number of offered packets
+        if self.strategy not in ('random', 'min_queue'):
+            raise ValueError(f"Unknown strategy '{self.strategy}'")
+        random_strategy = self.strategy == 'random'
+        targets = self.dispatch_targets
+        interarrival = self.arrival_streams.exponential
+        requirement = self.service_streams.exponential
+        uniform = self.dispatch_streams.uniform
+        arrival_rate = self.arrival_rate
+        service_rate = self.service_rate
+        queues = (self.queue1, self.queue2)
+        demands = self.demands
+        inf = float('inf')
+
+        offered = dropped = admitted = departed = 0
+        queue_length_sum = 0.0
+        total_sojourn_time = 0.0
+        now = 0.0
+        calendar = [interarrival(arrival_rate) if num_packets >= 1 else inf, inf, inf]
+
+        while offered < num_packets or departed < admitted:
+            arrival_time, departure1, departure2 = calendar
+            if arrival_time <= departure1 and arrival_time <= departure2:
+                slot = 0
+                now = arrival_time
+            elif departure1 <= departure2:
+                slot = 1
+                now = departure1
+            else:
+                slot = 2
+                now = departure2
+
+            if slot == 0:
+                offered += 1
+                work = requirement(service_rate)
+                len1 = queues[0].count
+                len2 = queues[1].count
+                queue_length_sum += (len1 + len2) / 2.0
+
+                # Same decision rules as select_queue, via dispatch_table
+                if random_strategy:
+                    first = 0 if uniform() < 0.5 else 1
+                else:
+                    first = 0 if len1 <= len2 else 1
+                target = targets[first][len1][len2]
+
+                if target < 0:
+                    dropped += 1
+                else:
+                    admitted += 1
+                    queues[target].push(now)
+                    demands[target].push(work)
+                    if queues[target].count == 1:
+                        calendar[1 + target] = now + work
+
+                if offered < num_packets:
+                    calendar[0] = now + interarrival(arrival_rate)
+                else:
+                    calendar[0] = inf
+
+            else:
+                queue = queues[slot - 1]
+                total_sojourn_time += now - queue.pop()
+                demands[slot - 1].pop()
+                departed += 1
+                if queue.count:
+                    calendar[slot] = now + demands[slot - 1].peek()
+                else:
+                    calendar[slot] = inf
+
+        self.current_time = now
+        self.packets_offered = offered
+        self.packets_dropped = dropped
+        self.packets_admitted = admitted
+        self.packets_departed = departed
+        self.queue_length_sum = queue_length_sum
+        self.total_queue_length_samples = offered
+        self.total_sojourn_time = total_sojourn_time
+        self.sojourn_time_samples = departed
+
+        return self.get_metrics()
+
+
+def _paired_run(arrival_rate, service_rate, num_packets, seed, queue_capacity, antithetic):
+    # Metrics of both strategies on the same random streams
+    results = {}
+    for strategy in ('random', 'min_queue'):
+        sim = CoupledTwoQueueSimulation(arrival_rate, service_rate, strategy=strategy, seed=seed,
+                                        queue_capacity=queue_capacity, antithetic=antithetic)
+        results[strategy] = sim.run(num_packets=num_packets)
+    return results
+
+
+def compare_strategies(arrival_rate, service_rate, num_runs=10, num_packets=10000, base_seed=0,
+                       queue_capacity=10, antithetic=False, confidence=0.95):
+
+    # Paired comparison of Random vs Min-Queue under common random numbers.
+    # With antithetic=True each replication also runs its antithetic twin and
+    # the pair's average counts as one observation.
+    #
+    # Returns, per metric, the mean of each strategy, the mean difference
+    # (random - min_queue) with its CI half-width, and the half-width the
+    # same number of independent runs would give for comparison.
+
+    if num_runs < 2:
+        raise ValueError("compare_strategies needs num_runs >= 2 to estimate a confidence interval")
+
+    observations = {metric: {'random': [], 'min_queue': []} for metric in COMPARED_METRICS}
+    for index in range(num_runs):
+        seed = replication_seed(base_seed, index)
+        runs = [_paired_run(arrival_rate, service_rate, num_packets, seed, queue_capacity, False)]
+        if antithetic:
+            runs.append(_paired_run(arrival_rate, service_rate, num_packets, seed, queue_capacity, True))
+        for metric in COMPARED_METRICS:
+            for strategy in ('random', 'min_queue'):
+                observations[metric][strategy].append(np.mean([run[strategy][metric] for run in runs]))
+
+    t = t_quantile((1 + confidence) / 2, num_runs - 1)
+    comparison = {}
+    for metric in COMPARED_METRICS:
+        random_values = np.array(observations[metric]['random'])
+        minq_values = np.array(observations[metric]['min_queue'])
+        differences = random_values - minq_values
+        comparison[metric] = {
+            'random': float(random_values.mean()),
+            'min_queue': float(minq_values.mean()),
+            'difference': float(differences.mean()),
+            'half_width': float(t * differences.std(ddof=1) / math.sqrt(num_runs)),
+            'independent_half_width': float(
+                t * math.sqrt((random_values.var(ddof=1) + minq_values.var(ddof=1)) / num_runs))
+        }
+    return comparison
@@ -0,0 +1,147 @@
+#Hot-path instrumentation and profiling helpers.
+#EngineInstrumentation counts every event and the event-heap high-water mark,
+#and times one event in every `sample_every` in detail: the heap pop, each
+#handler, queue selection, variate generation and heap pushes. Between
+#sampled events the simulation runs its plain methods, so enabling it costs
+#little and a simulation without it pays only one `is None` check per event.
+#profile_call wraps any function with cProfile and tracemalloc.
+
+import cProfile
+import heapq
+import io
+import pstats
+import time
+import tracemalloc
+
+
+# Methods of TwoQueueSimulation timed on sampled events (inclusive times)
+SECTIONS = ('handle_arrival', 'handle_departure', 'select_queue', 'next_packet', 'generate_service_time',
+            'schedule_event')
+
+
+class EngineInstrumentation:
+
+    def __init__(self, sample_every=64):
+        self.sample_every = sample_every
+        self.events = {}
+        self.total_events = 0
+        self.sampled_events = 0
+        self.heap_high_water = 0
+        self.section_time = dict.fromkeys(SECTIONS + ('heap_pop',), 0.0)
+        self.section_calls = dict.fromkeys(SECTIONS + ('heap_pop',), 0)
+        self._installed = False
+
+    def next_event(self, sim):
+        # Pop the next event for sim, timing it in detail if this event is sampled
+        queue = sim.event_queue
+        if len(queue) > self.heap_high_water:
+            self.heap_high_water = len(queue)
+        self.total_events += 1
+
+        if self.total_events % self.sample_every:
+            if self._installed:
+                self._uninstall(sim)
+            event = heapq.heappop(queue)
+        else:
+            if not self._installed:
+                self._install(sim)
+            self.sampled_events += 1
+            start = time.perf_counter()
+            event = heapq.heappop(queue)
+            self.section_time['heap_pop'] += time.perf_counter() - start
+            self.section_calls['heap_pop'] += 1
+
+        self.events[event.event_type] = self.events.get(event.event_type, 0) + 1
+        return event
+
+    def _install(self, sim):
+        # Shadow the methods with timing wrappers on this instance only
+        for name in SECTIONS:
+            setattr(sim, name, self._timed(name, getattr(sim, name)))
+        self._installed = True
+
+    def _uninstall(self, sim):
+        for name in SECTIONS:
+            delattr(sim, name)
+        self._installed = False
+
+    def _timed(self, name, method):
+        section_time = self.section_time
+        section_calls = self.section_calls
+        perf_counter = time.perf_counter
+
+        def timed(*args):
+            start = perf_counter()
+            result = method(*args)
+            section_time[name] += perf_counter() - start
+            section_calls[name] += 1
+            return result
+        return timed
+
+    def finish(self, sim):
+        # Restore the plain methods after a run
+        if self._installed:
+            self._uninstall(sim)
+
+    def report(self):
+        # Counters plus per-section time extrapolated from the sampled events.
+        # 'bookkeeping' is handler time not spent in the nested sections.
+        scale = self.total_events / self.sampled_events if self.sampled_events else 0.0
+        sections = {}
+        for name, seconds in self.section_time.items():
+            calls = self.section_calls[name]
+            sections[name] = {
+                'sampled_calls': calls,
+                'mean_us': 1e6 * seconds / calls if calls else 0.0,
+                'estimated_seconds': seconds * scale
+            }
+        handlers = self.section_time['handle_arrival'] + self.section_time['handle_departure']
+        nested = (self.section_time['select_queue'] + self.section_time['generate_service_time']
+                  + self.section_time['schedule_event'])
+        sections['bookkeeping'] = {'estimated_seconds': max(0.0, handlers - nested) * scale}
+        return {
+            'events': dict(self.events),
+            'total_events': self.total_events,
+            'sampled_events': self.sampled_events,
+            'heap_high_water': self.heap_high_water,
+            'sections': sections
+        }
+
+    def format_report(self):
+        report = self.report()
+        lines = [f"Events: {report['total_events']:,} {report['events']}",
+                 f"Heap high-water mark: {report['heap_high_water']}",
+                 f"Sampled 1 in {self.sample_every} events ({report['sampled_events']:,}); estimated time:"]
+        for name, entry in sorted(report['sections'].items(), key=lambda item: -item[1]['estimated_seconds']):
+            mean = f"  {entry['mean_us']:8.2f} us/call" if 'mean_us' in entry else ''
+            lines.append(f"  {name:24} {entry['estimated_seconds']:9.4f} s{mean}")
+        return "\n".join(lines)
+
+
+def profile_call(func, report_path, top=30):
+    # Run func() under cProfile and tracemalloc; write a text report to
+    # report_path and the raw profile to report_path + '.prof'
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        return func()
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stream = io.StringIO()
+        stream.write(f"Wall time: {elapsed:.3f} s\n")
+        stream.write(f"Traced memory: current {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB\n\n")
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats('cumulative').print_stats(top)
+        stream.write("Top allocation sites:\n")
+        for stat in snapshot.statistics('lineno')[:15]:
+            stream.write(f"  {stat}\n")
+        with open(report_path, 'w') as f:
+            f.write(stream.getvalue())
+        profiler.dump_stats(report_path + '.prof')
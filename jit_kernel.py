@@ -0,0 +1,205 @@
+#Compiled event-loop kernel for the two-queue model.
+#The kernel runs the calendar engine on plain arrays and pre-drawn variates.
+#With Numba installed it is compiled in nopython mode; without it the same
+#function runs as ordinary Python, and engine='auto' falls back to the
+#calendar engine instead.
+
+import numpy as np
+
+from queue_simulation import CalendarTwoQueueSimulation
+
+try:
+    import numba
+except ImportError:  # Numba is optional
+    numba = None
+
+HAVE_NUMBA = numba is not None
+
+# Kernel return codes
+FINISHED = 0
+NEED_EXPONENTIAL = 1
+NEED_UNIFORM = 2
+
+# Layout of the float state array
+F_NOW, F_ARRIVAL, F_DEPARTURE1, F_DEPARTURE2, F_QUEUE_LENGTH_SUM, F_SOJOURN_SUM = range(6)
+# Layout of the integer state array
+(I_OFFERED, I_DROPPED, I_ADMITTED, I_DEPARTED, I_HEAD1, I_HEAD2, I_COUNT1, I_COUNT2,
+ I_EXP_CURSOR, I_UNIF_CURSOR, I_PHASE, I_TARGET) = range(12)
+
+# Phases of the event in progress, so the kernel can stop for more variates
+# mid-event and resume exactly where it left off
+PHASE_NEXT_EVENT, PHASE_DISPATCH, PHASE_START_SERVICE, PHASE_NEXT_ARRIVAL, PHASE_NEXT_SERVICE = range(5)
+
+
+def _event_loop(fs, ints, buffers, exponentials, uniforms, arrival_rate, service_rate,
+                random_strategy, capacity, num_packets):
+
+    # Calendar-engine event loop on arrays. Consumes exponentials and
+    # uniforms through the cursors in `ints`, in the same order as
+    # CalendarTwoQueueSimulation, and returns NEED_EXPONENTIAL or NEED_UNIFORM
+    # when a block runs out (state is saved, call again after refilling) or
+    # FINISHED once num_packets have been offered and every packet has left.
+
+    inf = np.inf
+    while True:
+        phase = ints[I_PHASE]
+
+        if phase == PHASE_NEXT_EVENT:
+            if ints[I_OFFERED] >= num_packets and ints[I_DEPARTED] >= ints[I_ADMITTED]:
+                return FINISHED
+            arrival_time = fs[F_ARRIVAL]
+            departure1 = fs[F_DEPARTURE1]
+            departure2 = fs[F_DEPARTURE2]
+            if arrival_time <= departure1 and arrival_time <= departure2:
+                fs[F_NOW] = arrival_time
+                ints[I_OFFERED] += 1
+                fs[F_QUEUE_LENGTH_SUM] += (ints[I_COUNT1] + ints[I_COUNT2]) / 2.0
+                ints[I_PHASE] = PHASE_DISPATCH
+            else:
+                queue = 0 if departure1 <= departure2 else 1
+                now = departure1 if queue == 0 else departure2
+                fs[F_NOW] = now
+                head = ints[I_HEAD1 + queue]
+                fs[F_SOJOURN_SUM] += now - buffers[queue, head]
+                ints[I_HEAD1 + queue] = (head + 1) % capacity
+                ints[I_COUNT1 + queue] -= 1
+                ints[I_DEPARTED] += 1
+                ints[I_TARGET] = queue
+                ints[I_PHASE] = PHASE_NEXT_SERVICE
+
+        elif phase == PHASE_DISPATCH:
+            len1 = ints[I_COUNT1]
+            len2 = ints[I_COUNT2]
+            if random_strategy:
+                cursor = ints[I_UNIF_CURSOR]
+                if cursor == len(uniforms):
+                    return NEED_UNIFORM
+                ints[I_UNIF_CURSOR] = cursor + 1
+                first = 0 if uniforms[cursor] < 0.5 else 1
+                if ints[I_COUNT1 + first] < capacity:
+                    target = first
+                elif ints[I_COUNT1 + 1 - first] < capacity:
+                    target = 1 - first
+                else:
+                    target = -1
+            elif len1 < capacity and len2 < capacity:
+                target = 0 if len1 <= len2 else 1
+            elif len1 < capacity:
+                target = 0
+            elif len2 < capacity:
+                target = 1
+            else:
+                target = -1
+
+            if target < 0:
+                ints[I_DROPPED] += 1
+                ints[I_PHASE] = PHASE_NEXT_ARRIVAL
+            else:
+                ints[I_ADMITTED] += 1
+                count = ints[I_COUNT1 + target]
+                buffers[target, (ints[I_HEAD1 + target] + count) % capacity] = fs[F_NOW]
+                ints[I_COUNT1 + target] = count + 1
+                ints[I_TARGET] = target
+                ints[I_PHASE] = PHASE_START_SERVICE if count == 0 else PHASE_NEXT_ARRIVAL
+
+        elif phase == PHASE_START_SERVICE:
+            cursor = ints[I_EXP_CURSOR]
+            if cursor == len(exponentials):
+                return NEED_EXPONENTIAL
+            ints[I_EXP_CURSOR] = cursor + 1
+            fs[F_DEPARTURE1 + ints[I_TARGET]] = fs[F_NOW] + exponentials[cursor] / service_rate
+            ints[I_PHASE] = PHASE_NEXT_ARRIVAL
+
+        elif phase == PHASE_NEXT_ARRIVAL:
+            if ints[I_OFFERED] < num_packets:
+                cursor = ints[I_EXP_CURSOR]
+                if cursor == len(exponentials):
+                    return NEED_EXPONENTIAL
+                ints[I_EXP_CURSOR] = cursor + 1
+                fs[F_ARRIVAL] = fs[F_NOW] + exponentials[cursor] / arrival_rate
+            else:
+                fs[F_ARRIVAL] = inf
+            ints[I_PHASE] = PHASE_NEXT_EVENT
+
+        else:
+            queue = ints[I_TARGET]
+            if ints[I_COUNT1 + queue] > 0:
+                cursor = ints[I_EXP_CURSOR]
+                if cursor == len(exponentials):
+                    return NEED_EXPONENTIAL
+                ints[I_EXP_CURSOR] = cursor + 1
+                fs[F_DEPARTURE1 + queue] = fs[F_NOW] + exponentials[cursor] / service_rate
+            else:
+                fs[F_DEPARTURE1 + queue] = inf
+            ints[I_PHASE] = PHASE_NEXT_EVENT
+
+
+event_loop = numba.njit(cache=True, nogil=True)(_event_loop) if HAVE_NUMBA else _event_loop
+
+
+class JitTwoQueueSimulation(CalendarTwoQueueSimulation):
+    # Calendar engine whose event loop runs in the compiled kernel.
+    # Variates come from the simulation's RandomStreams blocks in the same
+    # order as the Python engines, so results are identical for the same seed.
+
+    def run(self, num_packets=10000):
+        #Run simulation for specified number of offered packets
+        if self.strategy not in ('random', 'min_queue'):
+            raise ValueError(f"Unknown strategy '{self.strategy}'")
+        if self.stats is not None:
+            raise ValueError("track_distributions is not supported by the compiled kernel")
+
+        inf = np.inf
+        fs = np.array([0.0, inf, inf, inf, 0.0, 0.0])
+        ints = np.zeros(12, dtype=np.int64)
+        buffers = np.zeros((2, self.queue_capacity))
+
+        # The kernel takes over the streams' current blocks and cursors; new
+        # blocks come from the array methods, so nothing goes through lists.
+        # The first arrival is drawn here, exactly as the Python engines do.
+        streams = self.streams
+        exponentials = np.asarray(streams._exponentials, dtype=float)
+        uniforms = np.asarray(streams._uniforms, dtype=float)
+        exp_cursor = streams._exp_cursor
+        if exp_cursor == len(exponentials):
+            exponentials = streams._exponential_array()
+            exp_cursor = 0
+        fs[F_ARRIVAL] = exponentials[exp_cursor] / self.arrival_rate
+        ints[I_EXP_CURSOR] = exp_cursor + 1
+        ints[I_UNIF_CURSOR] = streams._unif_cursor
+
+        while True:
+            code = event_loop(fs, ints, buffers, exponentials, uniforms, float(self.arrival_rate),
+                              float(self.service_rate), self.strategy == 'random',
+                              self.queue_capacity, num_packets)
+            if code == FINISHED:
+                break
+            if code == NEED_EXPONENTIAL:
+                exponentials = streams._exponential_array()
+                ints[I_EXP_CURSOR] = 0
+            else:
+                uniforms = streams._uniform_array()
+                ints[I_UNIF_CURSOR] = 0
+
+        # Hand the blocks back (as arrays, which the streams index the same way)
+        streams._exponentials = exponentials
+        streams._exp_cursor = int(ints[I_EXP_CURSOR])
+        streams._uniforms = uniforms
+        streams._unif_cursor = int(ints[I_UNIF_CURSOR])
+
+        self.current_time = float(fs[F_NOW])
+        self.packets_offered = int(ints[I_OFFERED])
+        self.packets_dropped = int(ints[I_DROPPED])
+        self.packets_admitted = int(ints[I_ADMITTED])
+        self.packets_departed = int(ints[I_DEPARTED])
+        self.queue_length_sum = float(fs[F_QUEUE_LENGTH_SUM])
+        self.total_queue_length_samples = self.packets_offered
+        self.total_sojourn_time = float(fs[F_SOJOURN_SUM])
+        self.sojourn_time_samples = self.packets_departed
+
+        return self.get_metrics()
+
+
+def best_engine():
+    # The compiled engine when Numba is available, otherwise the calendar engine
+    return JitTwoQueueSimulation if HAVE_NUMBA else CalendarTwoQueueSimulation
@@ -4,7 +4,7 @@ import sys
 import os
 
 
-def run_plots():
+def run_plots(output_dir='Output', formats=('png',), workers=None):
     #Generate all plots for Task 1
     print("\n" + "="*70)
     print("TASK 1: Generating Performance Comparison Plots")
@@ -12,14 +12,18 @@ def run_plots():
     
     from plotting import generate_all_plots
     
-    # Create output directory if it doesn't exist
-    os.makedirs('/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output', exist_ok=True)
-    
-    # Generate all plots
-    generate_all_plots(num_runs=10, num_packets=10000)
+    # Generate all plots (the sweep artifact is saved next to them)
+    generate_all_plots(num_runs=10, num_packets=10000, workers=workers, output_dir=output_dir, formats=formats)
     
     print("\n✓ Task 1 completed successfully!")
-    print("  All plots saved to /Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output\n")
+    print(f"  All plots saved to {os.path.abspath(output_dir)}\n")
+
+
+def render_plots(output_dir='Output', formats=('png',)):
+    #Redraw the plots from the saved sweep artifact without simulating
+    from plotting import render_from_artifact
+    rendered, skipped = render_from_artifact(output_dir, formats=formats)
+    print(f"\nRendered {len(rendered)} figures ({len(skipped)} unchanged) in {os.path.abspath(output_dir)}\n")
 
 
 def run_gui():
@@ -32,15 +36,165 @@ def run_gui():
     main()
 
 
+SWEEP_DEFAULTS = {
+    'parameter': 'arrival_rate',   # arrival_rate, service_rate or traffic_load
+    'start': 0.2,
+    'stop': 1.8,
+    'points': 9,
+    'fixed_rate': 1.0,             # μ for arrival_rate/traffic_load sweeps, λ for service_rate
+    'strategies': ['random', 'min_queue'],
+    'runs': 10,
+    'packets': 10000,
+    'capacity': 10,
+    'base_seed': 0,
+    'workers': None,
+    'output_dir': 'Output/sweep'
+}
+
+
+def run_sweep(argv, workers=None):
+    #Headless sweep from a JSON config file and/or flags, checkpointed to a journal so it can resume
+    import argparse
+    import json
+    import time
+    import numpy as np
+    from sweep import plan_sweep, execute_plan, save_results
+
+    parser = argparse.ArgumentParser(prog='main.py sweep', description="Run a resumable parameter sweep")
+    parser.add_argument('--config', help="JSON file with any of the options below")
+    parser.add_argument('--parameter', choices=('arrival_rate', 'service_rate', 'traffic_load'))
+    parser.add_argument('--start', type=float)
+    parser.add_argument('--stop', type=float)
+    parser.add_argument('--points', type=int)
+    parser.add_argument('--fixed-rate', dest='fixed_rate', type=float)
+    parser.add_argument('--strategies', type=lambda value: value.split(','))
+    parser.add_argument('--runs', type=int)
+    parser.add_argument('--packets', type=int)
+    parser.add_argument('--capacity', type=int)
+    parser.add_argument('--base-seed', dest='base_seed', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--output-dir', dest='output_dir')
+    parser.add_argument('--listen', metavar='HOST:PORT',
+                        help="run on cluster workers that join with 'python cluster.py worker HOST:PORT'")
+    args = parser.parse_args(argv)
+
+    # Defaults, then the config file, then flags
+    config = dict(SWEEP_DEFAULTS)
+    if args.config:
+        with open(args.config) as f:
+            config.update(json.load(f))
+    config.update({key: value for key, value in vars(args).items()
+                   if value is not None and key not in ('config', 'listen')})
+    if workers is not None:
+        config['workers'] = workers
+
+    values = np.linspace(config['start'], config['stop'], config['points'])
+    fixed = config['fixed_rate']
+    if config['parameter'] == 'arrival_rate':
+        points = [(value, fixed) for value in values]
+    elif config['parameter'] == 'service_rate':
+        points = [(fixed, value) for value in values]
+    else:
+        points = [(2 * value * fixed, fixed) for value in values]
+
+    output_dir = config['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'sweep_config.json'), 'w') as f:
+        json.dump(config, f, indent=2)
+
+    tasks = plan_sweep(points, num_runs=config['runs'], num_packets=config['packets'],
+                       capacity=config['capacity'], strategies=tuple(config['strategies']),
+                       base_seed=config['base_seed'])
+    journal = os.path.join(output_dir, 'journal.jsonl')
+    print(f"\nSweep of {config['parameter']}: {len(points)} points, {len(tasks)} replications")
+    print(f"Journal: {os.path.abspath(journal)}\n")
+
+    started = time.perf_counter()
+    last_report = [0.0]
+
+    def report(done, total):
+        # Throughput and ETA over the replications simulated in this session
+        now = time.perf_counter()
+        if now - last_report[0] < 1.0 and done < total:
+            return
+        last_report[0] = now
+        rate = done / (now - started)
+        eta = (total - done) / rate if rate > 0 else float('inf')
+        print(f"\r  {done}/{total} replications  {rate:.1f}/s  ETA {eta:.0f} s   ", end="", flush=True)
+
+    if args.listen:
+        from cluster import ClusterExecutor, parse_address
+        # --workers, if given, is the expected number of cluster worker processes
+        with ClusterExecutor(parse_address(args.listen), max_workers=config['workers']) as executor:
+            host, port = executor.address
+            print(f"Coordinator listening on {host}:{port}; start workers with "
+                  f"'python cluster.py worker <this host>:{port}'\n")
+            results = execute_plan(tasks, workers=config['workers'], executor=executor, progress=report,
+                                   journal=journal)
+    else:
+        results = execute_plan(tasks, workers=config['workers'], progress=report, journal=journal)
+    path = save_results(results, output_dir)
+    print(f"\n\nFinished in {time.perf_counter() - started:.1f} s; results saved to {os.path.abspath(path)}")
+
+    print(f"\n{'λ':>8} {'μ':>8} {'strategy':>10} {'blocking':>10} {'queue len':>10} {'sojourn':>10}")
+    for arrival_rate, service_rate in points:
+        for strategy in config['strategies']:
+            metrics = results.metrics(arrival_rate, service_rate, strategy)
+            print(f"{arrival_rate:8.3f} {service_rate:8.3f} {strategy:>10} {metrics['blocking_probability']:10.4f} "
+                  f"{metrics['average_queue_length']:10.4f} {metrics['average_sojourn_time']:10.4f}")
+    print()
+
+
+def build_surface():
+    #Precompute the response surface used for instant GUI estimates
+    from response_surface import ResponseSurface
+
+    def report(done, total):
+        print(f"\r  {done}/{total} replications", end="", flush=True)
+
+    surface = ResponseSurface.build(progress=report)
+    path = surface.save()
+    print(f"\n\nSaved response surface to {path}\n")
+
+
+def run_rare(capacity=10):
+    #Blocking probability at light load by multilevel splitting, where plain simulation reports 0
+    import numpy as np
+    from rare_event import rare_blocking
+
+    print(f"\n{'ρ':>6} {'strategy':>10} {'blocking':>12} {'rel. error':>11}")
+    for rho in np.linspace(0.1, 0.9, 9):
+        for strategy, result in rare_blocking(2 * rho, 1.0, queue_capacity=capacity, seed=0).items():
+            print(f"{rho:6.2f} {strategy:>10} {result['blocking_probability']:12.4e} {result['relative_error']:11.3f}")
+    print()
+
+
+def clear_cache():
+    #Remove every cached simulation result
+    from result_cache import ResultCache
+    cache = ResultCache()
+    cache.clear()
+    print(f"\nCleared result cache at {cache.directory}\n")
+
+
 def print_usage():
     #Print usage information
     print("\n" + "="*70)
     print("Two-Queue System Simulation - Course Project")
     print("="*70)
     print("\nUsage:")
-    print("  python main.py plots    - Generate all 9 plots for Task 1")
+    print("  python main.py plots [dir] [formats]  - Generate all 9 plots for Task 1 (default: Output png)")
+    print("  python main.py render [dir] [formats] - Redraw the plots from the saved sweep, no simulation")
     print("  python main.py gui      - Launch sensitivity analysis GUI for Task 2")
     print("  python main.py all      - Generate plots then launch GUI")
+    print("  python main.py sweep [--config file.json] [--parameter ... --runs ... ] - Resumable headless sweep")
+    print("                          (python main.py sweep --help lists the options)")
+    print("  python main.py surface  - Precompute the GUI's response surface")
+    print("  python main.py rare [capacity] - Rare-event blocking estimates at light load (ρ = 0.1 to 0.9)")
+    print("  python main.py clear-cache - Delete cached simulation results")
+    print("  Add --profile to any command to write a cProfile/tracemalloc report to profile_<command>.txt")
+    print("  (simulations then run in this process on the event engine with the cache off, and the report ends")
+    print("  with the engine's sampled per-section times)")
     print("\nDescription:")
     print("  This project simulates a two-queue system comparing Random Selection")
     print("  and Min-Queue packet assignment strategies.")
@@ -51,14 +205,40 @@ def print_usage():
 
 def main():
     #Main entry point
-    if len(sys.argv) < 2:
+    args = [arg for arg in sys.argv[1:] if arg != '--profile']
+    profile = len(args) < len(sys.argv) - 1
+    if not args:
         print_usage()
         return
     
-    command = sys.argv[1].lower()
+    command = args[0].lower()
+    if profile:
+        import sweep
+        from instrumentation import EngineInstrumentation, profile_call
+        report = f"profile_{command}.txt"
+        # One worker, so the simulations run inside the profiled process; the
+        # event engine and no cache, so the profile covers the simulation itself
+        os.environ['QUEUE_SIM_CACHE'] = '0'
+        sweep.DEFAULT_ENGINE = 'event'
+        sweep.INSTRUMENTATION = EngineInstrumentation()
+        profile_call(lambda: run_command(command, args[1:], workers=1), report)
+        if sweep.INSTRUMENTATION.total_events:
+            with open(report, 'a') as f:
+                f.write("\nEvent-engine instrumentation:\n" + sweep.INSTRUMENTATION.format_report() + "\n")
+        print(f"\nProfile report written to {os.path.abspath(report)} (raw profile: {report}.prof)\n")
+    else:
+        run_command(command, args[1:])
+
+
+def run_command(command, args, workers=None):
+    #Dispatch one command
+    output_dir = args[0] if len(args) > 0 else 'Output'
+    formats = tuple(args[1].split(',')) if len(args) > 1 else ('png',)
     
     if command == 'plots':
-        run_plots()
+        run_plots(output_dir, formats, workers)
+    elif command == 'render':
+        render_plots(output_dir, formats)
     elif command == 'gui':
         run_gui()
     elif command == 'all':
@@ -66,6 +246,14 @@ def main():
         print("\nPress Enter to continue to GUI...")
         input()
         run_gui()
+    elif command == 'sweep':
+        run_sweep(args, workers)
+    elif command == 'surface':
+        build_surface()
+    elif command == 'rare':
+        run_rare(int(args[0]) if args else 10)
+    elif command == 'clear-cache':
+        clear_cache()
     elif command in ['help', '-h', '--help']:
         print_usage()
     else:
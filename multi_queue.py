@@ -0,0 +1,230 @@
+#N-queue generalisation of TwoQueueSimulation for large dispatch tiers.
+#Queues are indexed by length in buckets, so join-shortest-queue, power-of-d
+#and join-idle-queue dispatch cost O(1) per arrival; departures sit in a heap,
+#so each event costs O(log N) overall.
+
+import heapq
+from collections import deque
+
+import numpy as np
+
+from queue_simulation import RandomStreams
+
+
+STRATEGIES = ('random', 'min_queue', 'power_of_d', 'jiq')
+
+
+class _IndexedSet:
+    # Set of queue ids with O(1) add, remove and uniform sampling
+
+    __slots__ = ('items', 'positions')
+
+    def __init__(self, num_queues):
+        self.items = []
+        self.positions = [-1] * num_queues
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, queue_id):
+        self.positions[queue_id] = len(self.items)
+        self.items.append(queue_id)
+
+    def remove(self, queue_id):
+        # Swap the last item into the removed slot
+        position = self.positions[queue_id]
+        last = self.items.pop()
+        if last != queue_id:
+            self.items[position] = last
+            self.positions[last] = position
+        self.positions[queue_id] = -1
+
+    def __contains__(self, queue_id):
+        return self.positions[queue_id] >= 0
+
+    def sample(self, u):
+        # Item picked by a uniform variate u in [0, 1)
+        return self.items[int(u * len(self.items))]
+
+
+class LengthBuckets:
+    # Non-full queues grouped by current length.
+    # buckets[k] holds the queues of length k; min_length points at the
+    # lowest non-empty bucket, and available holds every non-full queue.
+
+    def __init__(self, capacities):
+        self.capacities = capacities
+        num_queues = len(capacities)
+        self.buckets = [_IndexedSet(num_queues) for _ in range(max(capacities) + 1)]
+        self.available = _IndexedSet(num_queues)
+        self.min_length = 0
+        for queue_id in range(num_queues):
+            self.buckets[0].add(queue_id)
+            self.available.add(queue_id)
+
+    def shortest(self, u):
+        # A uniformly chosen shortest non-full queue, or -1 if all are full
+        if not len(self.available):
+            return -1
+        return self.buckets[self.min_length].sample(u)
+
+    def grew(self, queue_id, new_length):
+        # Move a queue up one bucket after an arrival
+        self.buckets[new_length - 1].remove(queue_id)
+        if new_length < self.capacities[queue_id]:
+            self.buckets[new_length].add(queue_id)
+        else:
+            self.available.remove(queue_id)
+        if not len(self.available):
+            self.min_length = 0
+            return
+        while not len(self.buckets[self.min_length]):
+            self.min_length += 1
+
+    def shrank(self, queue_id, new_length):
+        # Move a queue down one bucket after a departure
+        if queue_id in self.available:
+            self.buckets[new_length + 1].remove(queue_id)
+        else:
+            self.available.add(queue_id)
+        self.buckets[new_length].add(queue_id)
+        if new_length < self.min_length or len(self.available) == 1:
+            self.min_length = new_length
+
+
+class MultiQueueSimulation:
+    # N parallel FCFS queues, each with its own server and capacity.
+    # Strategies:
+    #   'random'     - uniform queue; if it is full, a uniform non-full queue
+    #   'min_queue'  - join the shortest non-full queue (ties broken at random)
+    #   'power_of_d' - shortest non-full queue among d sampled at random
+    #   'jiq'        - an idle queue if there is one, else a random non-full queue
+    # A packet is dropped only when every queue is full, as in TwoQueueSimulation.
+
+    def __init__(self, arrival_rate, service_rate, num_queues=2, strategy='random', queue_capacity=10,
+                 d=2, seed=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}'")
+        self.arrival_rate = arrival_rate
+        self.num_queues = num_queues
+        self.strategy = strategy
+        self.d = d
+        self.service_rates = [float(rate) for rate in np.broadcast_to(service_rate, (num_queues,))]
+        self.capacities = [int(c) for c in np.broadcast_to(queue_capacity, (num_queues,))]
+
+        self.streams = RandomStreams(seed)
+        self.queues = [deque() for _ in range(num_queues)]  # arrival times, head in service
+        self.buckets = LengthBuckets(self.capacities)
+        self.departures = []  # heap of (time, queue_id)
+
+        # Statistics
+        self.current_time = 0.0
+        self.packets_offered = 0
+        self.packets_dropped = 0
+        self.packets_admitted = 0
+        self.packets_departed = 0
+        self.packets_in_system = 0
+        self.queue_length_sum = 0.0
+        self.total_sojourn_time = 0.0
+
+    def select_queue(self):
+        # Queue id for an arriving packet, or -1 if every queue is full
+        buckets = self.buckets
+        uniform = self.streams.uniform
+        if not len(buckets.available):
+            return -1
+
+        if self.strategy == 'min_queue':
+            return buckets.shortest(uniform())
+
+        if self.strategy == 'jiq':
+            if buckets.min_length == 0:
+                return buckets.buckets[0].sample(uniform())
+            return buckets.available.sample(uniform())
+
+        if self.strategy == 'power_of_d':
+            best = -1
+            best_length = 0
+            for _ in range(self.d):
+                queue_id = int(uniform() * self.num_queues)
+                length = len(self.queues[queue_id])
+                if length < self.capacities[queue_id] and (best < 0 or length < best_length):
+                    best = queue_id
+                    best_length = length
+            if best >= 0:
+                return best
+            return buckets.available.sample(uniform())
+
+        queue_id = int(uniform() * self.num_queues)
+        if len(self.queues[queue_id]) < self.capacities[queue_id]:
+            return queue_id
+        return buckets.available.sample(uniform())
+
+    def run(self, num_packets=10000):
+        #Run simulation for specified number of offered packets
+        exponential = self.streams.exponential
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        queues = self.queues
+        buckets = self.buckets
+        departures = self.departures
+        service_rates = self.service_rates
+        num_queues = self.num_queues
+        inf = float('inf')
+
+        next_arrival = self.current_time + exponential(self.arrival_rate) if num_packets >= 1 else inf
+
+        while True:
+            next_departure = departures[0][0] if departures else inf
+            if next_arrival <= next_departure:
+                if next_arrival == inf:
+                    break
+                now = self.current_time = next_arrival
+                self.packets_offered += 1
+                self.queue_length_sum += self.packets_in_system / num_queues
+
+                queue_id = self.select_queue()
+                if queue_id < 0:
+                    self.packets_dropped += 1
+                else:
+                    self.packets_admitted += 1
+                    self.packets_in_system += 1
+                    queue = queues[queue_id]
+                    queue.append(now)
+                    buckets.grew(queue_id, len(queue))
+                    if len(queue) == 1:
+                        heappush(departures, (now + exponential(service_rates[queue_id]), queue_id))
+
+                if self.packets_offered < num_packets:
+                    next_arrival = now + exponential(self.arrival_rate)
+                else:
+                    next_arrival = inf
+            else:
+                now, queue_id = heappop(departures)
+                self.current_time = now
+                queue = queues[queue_id]
+                self.total_sojourn_time += now - queue.popleft()
+                self.packets_departed += 1
+                self.packets_in_system -= 1
+                buckets.shrank(queue_id, len(queue))
+                if queue:
+                    heappush(departures, (now + exponential(service_rates[queue_id]), queue_id))
+
+            if self.packets_offered >= num_packets and self.packets_departed >= self.packets_admitted:
+                break
+
+        return self.get_metrics()
+
+    def get_metrics(self):
+        #Same keys as TwoQueueSimulation.get_metrics; queue length is the per-queue mean at arrivals
+        offered = self.packets_offered
+        return {
+            'blocking_probability': self.packets_dropped / offered if offered > 0 else 0,
+            'average_queue_length': self.queue_length_sum / offered if offered > 0 else 0,
+            'average_sojourn_time': (self.total_sojourn_time / self.packets_departed
+                                     if self.packets_departed > 0 else 0),
+            'packets_offered': self.packets_offered,
+            'packets_dropped': self.packets_dropped,
+            'packets_admitted': self.packets_admitted,
+            'packets_departed': self.packets_departed
+        }
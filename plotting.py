@@ -1,4 +1,4 @@
-##AI Used for the following: 
+##AI Used for the following:
         #formatting code
         #optimizing imports
         #code refactoring
@@ -12,273 +12,204 @@
 
 ###############################  Plotting module for generating performance comparison figures  ###############################
 
-import numpy as np
-import matplotlib.pyplot as plt
-from queue_simulation import run_multiple_simulations
-
-
-def plot_vs_arrival_rate(service_rate=1.0, num_runs=10, num_packets=10000, save_prefix=''):
-    
-    ########################### Generate plots comparing strategies vs arrival rate #############################
-
-
-    # Range of arrival rates
-    arrival_rates = np.linspace(0.2, 1.8, 9)  # λ from 0.2 to 1.8
-    
-    random_blocking = [] # Blocking probabilities for random strategy
-    random_queue_length = [] # Average queue lengths for random strategy
-    random_sojourn = [] # Average sojourn times for random strategy
-    
-    minq_blocking = [] # Blocking probabilities for min-queue strategy
-    minq_queue_length = [] # Average queue lengths for min-queue strategy
-    minq_sojourn = [] # Average sojourn times for min-queue strategy
-    
-    print("Simulating vs Arrival Rate...")
-    for i, arrival_rate in enumerate(arrival_rates):
-        print(f"  Progress: {i+1}/{len(arrival_rates)} (λ={arrival_rate:.2f})")
-        
-        # Random strategy 
-        metrics_random = run_multiple_simulations(
-            arrival_rate=arrival_rate, # Lambda
-            service_rate=service_rate, # Mu
-            strategy='random', # Strategy type
-            num_runs=num_runs, # Number of runs
-            num_packets=num_packets # Packets per run
-        )
-        random_blocking.append(metrics_random['blocking_probability']) # Blocking probability
-        random_queue_length.append(metrics_random['average_queue_length']) # Average queue length
-        random_sojourn.append(metrics_random['average_sojourn_time']) # Average sojourn time
-        
-        # Min-queue strategy
-        metrics_minq = run_multiple_simulations(
-            arrival_rate=arrival_rate,
-            service_rate=service_rate,
-            strategy='min_queue',
-            num_runs=num_runs,
-            num_packets=num_packets
-        )
-        minq_blocking.append(metrics_minq['blocking_probability'])
-        minq_queue_length.append(metrics_minq['average_queue_length'])
-        minq_sojourn.append(metrics_minq['average_sojourn_time'])
-    
-    # Calculate traffic load for x-axis
-    traffic_loads = arrival_rates / (2 * service_rate)
-    
-    # Plot 1: Blocking Probability vs Arrival Rate
-    plt.figure(figsize=(10, 6))
-    plt.plot(arrival_rates, random_blocking, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(arrival_rates, minq_blocking, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Arrival Rate (λ)', fontsize=12)
-    plt.ylabel('Blocking Probability', fontsize=12)
-    plt.title('Blocking Probability vs Arrival Rate', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}blocking_vs_arrival_rate.png', dpi=300)
-    plt.close()
-    
-    # Plot 2: Average Queue Length vs Arrival Rate
-    plt.figure(figsize=(10, 6))
-    plt.plot(arrival_rates, random_queue_length, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(arrival_rates, minq_queue_length, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Arrival Rate (λ)', fontsize=12)
-    plt.ylabel('Average Queue Length', fontsize=12)
-    plt.title('Average Queue Length vs Arrival Rate', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}queue_length_vs_arrival_rate.png', dpi=300)
-    plt.close()
-    
-    # Plot 3: Average Sojourn Time vs Arrival Rate
-    plt.figure(figsize=(10, 6))
-    plt.plot(arrival_rates, random_sojourn, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(arrival_rates, minq_sojourn, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Arrival Rate (λ)', fontsize=12)
-    plt.ylabel('Average Sojourn Time', fontsize=12)
-    plt.title('Average Sojourn Time vs Arrival Rate', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}sojourn_vs_arrival_rate.png', dpi=300)
-    plt.close()
-    
-    print("Plots vs Arrival Rate completed!")
-
-
-def plot_vs_service_rate(arrival_rate=1.0, num_runs=10, num_packets=10000, save_prefix=''):
+# Simulation and rendering are separate steps: the sweep is simulated once and
+# saved as a CSV artifact (sweep.save_results), and the renderer draws the nine
+# figures from that artifact in parallel worker processes with the Agg canvas.
+# A manifest of input hashes lets the renderer skip figures whose data and
+# style have not changed, so restyling never reruns a simulation.
+
+import hashlib
+import json
+import os
+
+from sweep import (arrival_rate_sweep, service_rate_sweep, traffic_load_sweep, default_points,
+                   plan_sweep, execute_plan, save_results, load_results, STRATEGIES)
+
+
+DEFAULT_OUTPUT_DIR = 'Output'
+MANIFEST = '.render_manifest.json'
+
+# Everything that affects how a figure looks; editing it re-renders all figures
+STYLE = {
+    'figsize': (10, 6),
+    'markers': {'random': 'o-', 'min_queue': 's-'},
+    'labels': {'random': 'Random Selection', 'min_queue': 'Min-Queue'},
+    'linewidth': 2,
+    'label_size': 12,
+    'title_size': 14,
+    'legend_size': 11,
+    'grid_alpha': 0.3
+}
+
+# (file stem, metric key, axis label)
+METRICS = (
+    ('blocking', 'blocking_probability', 'Blocking Probability'),
+    ('queue_length', 'average_queue_length', 'Average Queue Length'),
+    ('sojourn', 'average_sojourn_time', 'Average Sojourn Time')
+)
+
+# file suffix -> (x-axis label, title suffix)
+SWEEPS = {
+    'arrival_rate': ('Arrival Rate (λ)', 'Arrival Rate'),
+    'service_rate': ('Service Rate (μ)', 'Service Rate'),
+    'traffic_load': ('Traffic Load (ρ = λ/(2μ))', 'Traffic Load')
+}
+
+
+def _sweep_points(sweep, fixed_rate=1.0):
+    # x values and (λ, μ) points of one of the three sweeps
+    if sweep == 'arrival_rate':
+        return arrival_rate_sweep(fixed_rate)    # λ from 0.2 to 1.8 at fixed μ
+    if sweep == 'service_rate':
+        return service_rate_sweep(fixed_rate)    # μ from 0.3 to 2.0 at fixed λ
+    return traffic_load_sweep(fixed_rate)        # ρ from 0.1 to 0.9 at fixed μ
+
+
+def figure_jobs(results, sweeps=tuple(SWEEPS), fixed_rate=1.0, save_prefix=''):
+    # One render job per figure: the plotted numbers plus labels, no simulation objects
+    jobs = []
+    for sweep in sweeps:
+        x_values, points = _sweep_points(sweep, fixed_rate)
+        point_metrics = {strategy: [results.metrics(lam, mu, strategy) for lam, mu in points]
+                         for strategy in STRATEGIES}
+        x_label, title = SWEEPS[sweep]
+        for stem, metric, y_label in METRICS:
+            jobs.append({
+                'name': f'{save_prefix}{stem}_vs_{sweep}',
+                'x': [float(x) for x in x_values],
+                'y': {strategy: [float(m[metric]) for m in point_metrics[strategy]] for strategy in STRATEGIES},
+                'x_label': x_label,
+                'y_label': y_label,
+                'title': f'{y_label} vs {title}'
+            })
+    return jobs
+
+
+def _job_hash(job, formats, dpi):
+    payload = json.dumps([job, STYLE, sorted(formats), dpi], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render_figure(job, output_dir, formats=('png',), dpi=300, style=None):
+    # Draw one figure and save it in every format. Uses the Figure API directly
+    # (Agg canvas), so it is safe in worker processes without a display.
+    # style is passed explicitly so workers see the caller's STYLE.
+    from matplotlib.figure import Figure
+
+    style = style or STYLE
+    fig = Figure(figsize=style['figsize'])
+    ax = fig.add_subplot(111)
+    for strategy in STRATEGIES:
+        ax.plot(job['x'], job['y'][strategy], style['markers'][strategy],
+                label=style['labels'][strategy], linewidth=style['linewidth'])
+    ax.set_xlabel(job['x_label'], fontsize=style['label_size'])
+    ax.set_ylabel(job['y_label'], fontsize=style['label_size'])
+    ax.set_title(job['title'], fontsize=style['title_size'])
+    ax.legend(fontsize=style['legend_size'])
+    ax.grid(True, alpha=style['grid_alpha'])
+    fig.tight_layout()
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"{job['name']}.{fmt}")
+        fig.savefig(path, dpi=dpi)
+        paths.append(path)
+    return paths
+
+
+def render_plots(results, output_dir=DEFAULT_OUTPUT_DIR, formats=('png',), dpi=300, workers=None, force=False,
+                 jobs=None):
+
+    # Render the figures for `results` (all nine by default) into output_dir.
+    # Figures whose inputs, style, formats and dpi match the last render, and
+    # whose files still exist, are skipped unless force=True.
+    # Returns (rendered names, skipped names).
+
+    os.makedirs(output_dir, exist_ok=True)
+    if jobs is None:
+        jobs = figure_jobs(results)
+
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    pending = []
+    skipped = []
+    for job in jobs:
+        digest = _job_hash(job, formats, dpi)
+        outputs_exist = all(os.path.exists(os.path.join(output_dir, f"{job['name']}.{fmt}")) for fmt in formats)
+        if not force and manifest.get(job['name']) == digest and outputs_exist:
+            skipped.append(job['name'])
+        else:
+            pending.append((job, digest))
+
+    if workers is None:
+        workers = min(len(pending), os.cpu_count() or 1)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(render_figure, job, output_dir, formats, dpi, STYLE) for job, _ in pending]
+            for future in futures:
+                future.result()
+    else:
+        for job, _ in pending:
+            render_figure(job, output_dir, formats, dpi)
+
+    manifest.update({job['name']: digest for job, digest in pending})
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return [job['name'] for job, _ in pending], skipped
+
+
+def render_from_artifact(artifact_dir=DEFAULT_OUTPUT_DIR, output_dir=None, formats=('png',), dpi=300,
+                         workers=None, force=False):
+    # Re-render all figures from a saved sweep artifact without simulating
+    results, _ = load_results(artifact_dir)
+    return render_plots(results, output_dir or artifact_dir, formats=formats, dpi=dpi, workers=workers,
+                        force=force)
+
+
+def _plot_sweep(sweep, fixed_rate, num_runs, num_packets, save_prefix, results, output_dir, formats, executor):
+    # Shared body of the plot_vs_* functions
+    if results is None:
+        _, points = _sweep_points(sweep, fixed_rate)
+        print(f"Simulating vs {SWEEPS[sweep][1]}...")
+        results = execute_plan(plan_sweep(points, num_runs=num_runs, num_packets=num_packets), executor=executor)
+    jobs = figure_jobs(results, sweeps=(sweep,), fixed_rate=fixed_rate, save_prefix=save_prefix)
+    render_plots(results, output_dir, formats=formats, workers=1, jobs=jobs)
+    print(f"Plots vs {SWEEPS[sweep][1]} completed!")
+
+
+def plot_vs_arrival_rate(service_rate=1.0, num_runs=10, num_packets=10000, save_prefix='', results=None,
+                         output_dir=DEFAULT_OUTPUT_DIR, formats=('png',), executor=None):
+    """
+    Generate plots comparing strategies vs arrival rate
+    """
+    _plot_sweep('arrival_rate', service_rate, num_runs, num_packets, save_prefix, results, output_dir, formats,
+                executor)
+
+
+def plot_vs_service_rate(arrival_rate=1.0, num_runs=10, num_packets=10000, save_prefix='', results=None,
+                         output_dir=DEFAULT_OUTPUT_DIR, formats=('png',), executor=None):
     """
     Generate plots comparing strategies vs service rate
     """
-    # Range of service rates
-    service_rates = np.linspace(0.3, 2.0, 9)  # μ from 0.3 to 2.0
-    
-    random_blocking = []
-    random_queue_length = []
-    random_sojourn = []
-    
-    minq_blocking = []
-    minq_queue_length = []
-    minq_sojourn = []
-    
-    print("Simulating vs Service Rate...")
-    for i, service_rate in enumerate(service_rates):
-        print(f"  Progress: {i+1}/{len(service_rates)} (μ={service_rate:.2f})")
-        
-        # Random strategy
-        metrics_random = run_multiple_simulations(
-            arrival_rate=arrival_rate,
-            service_rate=service_rate,
-            strategy='random',
-            num_runs=num_runs,
-            num_packets=num_packets
-        )
-        random_blocking.append(metrics_random['blocking_probability'])
-        random_queue_length.append(metrics_random['average_queue_length'])
-        random_sojourn.append(metrics_random['average_sojourn_time'])
-        
-        # Min-queue strategy
-        metrics_minq = run_multiple_simulations(
-            arrival_rate=arrival_rate,
-            service_rate=service_rate,
-            strategy='min_queue',
-            num_runs=num_runs,
-            num_packets=num_packets
-        )
-        minq_blocking.append(metrics_minq['blocking_probability'])
-        minq_queue_length.append(metrics_minq['average_queue_length'])
-        minq_sojourn.append(metrics_minq['average_sojourn_time'])
-    
-    # Plot 4: Blocking Probability vs Service Rate
-    plt.figure(figsize=(10, 6))
-    plt.plot(service_rates, random_blocking, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(service_rates, minq_blocking, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Service Rate (μ)', fontsize=12)
-    plt.ylabel('Blocking Probability', fontsize=12)
-    plt.title('Blocking Probability vs Service Rate', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}blocking_vs_service_rate.png', dpi=300)
-    plt.close()
-    
-    # Plot 5: Average Queue Length vs Service Rate
-    plt.figure(figsize=(10, 6))
-    plt.plot(service_rates, random_queue_length, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(service_rates, minq_queue_length, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Service Rate (μ)', fontsize=12)
-    plt.ylabel('Average Queue Length', fontsize=12)
-    plt.title('Average Queue Length vs Service Rate', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}queue_length_vs_service_rate.png', dpi=300)
-    plt.close()
-    
-    # Plot 6: Average Sojourn Time vs Service Rate
-    plt.figure(figsize=(10, 6))
-    plt.plot(service_rates, random_sojourn, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(service_rates, minq_sojourn, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Service Rate (μ)', fontsize=12)
-    plt.ylabel('Average Sojourn Time', fontsize=12)
-    plt.title('Average Sojourn Time vs Service Rate', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}sojourn_vs_service_rate.png', dpi=300)
-    plt.close()
-    
-    print("Plots vs Service Rate completed!")
-
-
-def plot_vs_traffic_load(num_runs=10, num_packets=10000, save_prefix=''):
+    _plot_sweep('service_rate', arrival_rate, num_runs, num_packets, save_prefix, results, output_dir, formats,
+                executor)
+
+
+def plot_vs_traffic_load(num_runs=10, num_packets=10000, save_prefix='', results=None,
+                         output_dir=DEFAULT_OUTPUT_DIR, formats=('png',), executor=None):
     """
-    Generate plots comparing strategies vs traffic load (ρ = λ/(2μ))
+    Generate plots comparing strategies vs traffic load (ρ = λ/(2μ)), μ fixed at 1.0
     """
-    # Keep μ fixed at 1.0 and vary λ to get different ρ values
-    service_rate = 1.0
-    traffic_loads = np.linspace(0.1, 0.9, 9)  # ρ from 0.1 to 0.9
-    arrival_rates = traffic_loads * 2 * service_rate  # λ = ρ * 2μ
-    
-    random_blocking = []
-    random_queue_length = []
-    random_sojourn = []
-    
-    minq_blocking = []
-    minq_queue_length = []
-    minq_sojourn = []
-    
-    print("Simulating vs Traffic Load...")
-    for i, (traffic_load, arrival_rate) in enumerate(zip(traffic_loads, arrival_rates)):
-        print(f"  Progress: {i+1}/{len(traffic_loads)} (ρ={traffic_load:.2f})")
-        
-        # Random strategy
-        metrics_random = run_multiple_simulations(
-            arrival_rate=arrival_rate,
-            service_rate=service_rate,
-            strategy='random',
-            num_runs=num_runs,
-            num_packets=num_packets
-        )
-        random_blocking.append(metrics_random['blocking_probability'])
-        random_queue_length.append(metrics_random['average_queue_length'])
-        random_sojourn.append(metrics_random['average_sojourn_time'])
-        
-        # Min-queue strategy
-        metrics_minq = run_multiple_simulations(
-            arrival_rate=arrival_rate,
-            service_rate=service_rate,
-            strategy='min_queue',
-            num_runs=num_runs,
-            num_packets=num_packets
-        )
-        minq_blocking.append(metrics_minq['blocking_probability'])
-        minq_queue_length.append(metrics_minq['average_queue_length'])
-        minq_sojourn.append(metrics_minq['average_sojourn_time'])
-    
-    # Plot 7: Blocking Probability vs Traffic Load
-    plt.figure(figsize=(10, 6))
-    plt.plot(traffic_loads, random_blocking, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(traffic_loads, minq_blocking, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Traffic Load (ρ = λ/(2μ))', fontsize=12)
-    plt.ylabel('Blocking Probability', fontsize=12)
-    plt.title('Blocking Probability vs Traffic Load', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}blocking_vs_traffic_load.png', dpi=300)
-    plt.close()
-    
-    # Plot 8: Average Queue Length vs Traffic Load
-    plt.figure(figsize=(10, 6))
-    plt.plot(traffic_loads, random_queue_length, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(traffic_loads, minq_queue_length, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Traffic Load (ρ = λ/(2μ))', fontsize=12)
-    plt.ylabel('Average Queue Length', fontsize=12)
-    plt.title('Average Queue Length vs Traffic Load', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}queue_length_vs_traffic_load.png', dpi=300)
-    plt.close()
-    
-    # Plot 9: Average Sojourn Time vs Traffic Load
-    plt.figure(figsize=(10, 6))
-    plt.plot(traffic_loads, random_sojourn, 'o-', label='Random Selection', linewidth=2)
-    plt.plot(traffic_loads, minq_sojourn, 's-', label='Min-Queue', linewidth=2)
-    plt.xlabel('Traffic Load (ρ = λ/(2μ))', fontsize=12)
-    plt.ylabel('Average Sojourn Time', fontsize=12)
-    plt.title('Average Sojourn Time vs Traffic Load', fontsize=14)
-    plt.legend(fontsize=11)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f'/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output{save_prefix}sojourn_vs_traffic_load.png', dpi=300)
-    plt.close()
-    
-    print("Plots vs Traffic Load completed!")
-
-
-def generate_all_plots(num_runs=10, num_packets=10000):
+    _plot_sweep('traffic_load', 1.0, num_runs, num_packets, save_prefix, results, output_dir, formats,
+                executor)
+
+
+def generate_all_plots(num_runs=10, num_packets=10000, workers=None, output_dir=DEFAULT_OUTPUT_DIR,
+                       formats=('png',), dpi=300, executor=None):
     """
     Generate all 9 required plots for Task 1
     """
@@ -286,21 +217,27 @@ def generate_all_plots(num_runs=10, num_packets=10000):
     print("GENERATING ALL PERFORMANCE PLOTS (TASK 1)")
     print("="*60)
     print(f"Configuration: {num_runs} runs, {num_packets} packets per run\n")
-    
-    # Create output directory if it doesn't exist
-    import os
-    os.makedirs('/Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output', exist_ok=True)
-    
-    # Generate all plots
-    plot_vs_arrival_rate(service_rate=1.0, num_runs=num_runs, num_packets=num_packets)
-    print()
-    plot_vs_service_rate(arrival_rate=1.0, num_runs=num_runs, num_packets=num_packets)
-    print()
-    plot_vs_traffic_load(num_runs=num_runs, num_packets=num_packets)
-    
+
+    # Simulate every distinct point of the three sweeps once, across all cores
+    tasks = plan_sweep(default_points(), num_runs=num_runs, num_packets=num_packets)
+    print(f"Simulating {len(tasks)} replications...")
+
+    def report(done, total):
+        if done % max(1, total // 10) == 0 or done == total:
+            print(f"  Progress: {done}/{total}")
+
+    # executor (e.g. a cluster.ClusterExecutor) runs the replications instead of a local pool
+    results = execute_plan(tasks, workers=workers, executor=executor, progress=report)
+    artifact = save_results(results, output_dir)
+    print(f"Sweep results saved to {artifact}\n")
+
+    # Render all figures from the results, in parallel
+    rendered, skipped = render_plots(results, output_dir, formats=formats, dpi=dpi, workers=workers)
+    print(f"Rendered {len(rendered)} figures ({len(skipped)} unchanged)")
+
     print("\n" + "="*60)
     print("ALL PLOTS COMPLETED!")
-    print("Plots saved to /Users/shanebano/Documents/GitHub/COMP6320_Final_Project/Output")
+    print(f"Plots saved to {os.path.abspath(output_dir)}")
     print("="*60)
 
 
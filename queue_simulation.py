@@ -1,10 +1,20 @@
 #Human generated with AI debugging
 
-import random
 import heapq
+import json
+import os
 from dataclasses import dataclass
 from typing import List, Tuple
 import numpy as np
+from result_cache import resolve_cache
+from streaming_stats import StreamingStats
+
+# Bump whenever a change alters the results the event engine produces for a seed,
+# so stale entries in the result cache are never reused
+ENGINE_VERSION = 1
+
+# Bump whenever the layout written by TwoQueueSimulation.save_state changes
+SNAPSHOT_VERSION = 2
 
 
 @dataclass
@@ -15,6 +25,7 @@ class Packet:
     queue_assigned: int = -1  # -1 means not assigned yet
     service_start_time: float = -1
     departure_time: float = -1
+    service_demand: float = -1  # -1 means drawn when service starts
 
 
 @dataclass
@@ -74,21 +85,73 @@ class Queue:
         return None
 
 
+class RandomStreams:
+    # Per-simulation random numbers from a private numpy Generator.
+    # Exponentials and uniforms are drawn in blocks and consumed through a
+    # cursor, so per-event sampling is a list lookup instead of a library call.
+
+    def __init__(self, seed=None, block_size=4096):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self.generator = np.random.default_rng(seed)
+        self.block_size = block_size
+
+        self._exponentials = []
+        self._exp_cursor = 0
+        self._uniforms = []
+        self._unif_cursor = 0
+
+    def exponential(self, rate):
+        # Exponential variate with the given rate
+        i = self._exp_cursor
+        if i == len(self._exponentials):
+            self._exponentials = self._exponential_block()
+            i = 0
+        self._exp_cursor = i + 1
+        return self._exponentials[i] / rate
+
+    def uniform(self):
+        # Uniform variate on [0, 1)
+        i = self._unif_cursor
+        if i == len(self._uniforms):
+            self._uniforms = self._uniform_block()
+            i = 0
+        self._unif_cursor = i + 1
+        return self._uniforms[i]
+
+    def _exponential_block(self):
+        # Next block of unit-rate exponentials, as a list for the Python engines
+        return self._exponential_array().tolist()
+
+    def _uniform_block(self):
+        # Next block of uniforms on [0, 1), as a list for the Python engines
+        return self._uniform_array().tolist()
+
+    def _exponential_array(self):
+        # Next block of unit-rate exponentials as an array; the compiled kernel reads it directly
+        return self.generator.standard_exponential(self.block_size)
+
+    def _uniform_array(self):
+        # Next block of uniforms on [0, 1) as an array
+        return self.generator.random(self.block_size)
+
+
 class TwoQueueSimulation:
     #Main simulation class for two-queue system
     
-    def __init__(self, arrival_rate, service_rate, strategy='random', seed=None):
+    def __init__(self, arrival_rate, service_rate, strategy='random', seed=None, queue_capacity=10,
+                 track_distributions=False, trace=None, instrument=None):
         
         # Initialize simulation
         
         self.arrival_rate = arrival_rate
         self.service_rate = service_rate
         self.strategy = strategy
-        self.queue_capacity = 10
+        self.queue_capacity = queue_capacity
         
-        if seed is not None:
-            random.seed(seed)
-            np.random.seed(seed)
+        # Private random streams; seed may be an int or a SeedSequence
+        self.streams = RandomStreams(seed)
         
         # Initialize queues
         self.queue1 = Queue(capacity=self.queue_capacity, queue_id=0)
@@ -110,20 +173,42 @@ class TwoQueueSimulation:
         self.total_sojourn_time = 0.0
         self.sojourn_time_samples = 0
         
+        # Id of the next packet to create, and whether run() continues a loaded snapshot
+        self.next_packet_id = 0
+        self._resuming = False
+        
+        # Optional sojourn-time sketch and time-weighted occupancy (constant memory)
+        self.stats = StreamingStats(2, queue_capacity) if track_distributions else None
+        
+        # Optional trace_sink.TraceSink receiving every departed and dropped packet
+        self.trace = trace
+        
+        # Optional hot-path counters: True or an instrumentation.EngineInstrumentation
+        if instrument is True:
+            from instrumentation import EngineInstrumentation
+            instrument = EngineInstrumentation()
+        self.instrumentation = instrument or None
+        
     def generate_arrival_time(self):
         # Generate next arrival time using exponential distribution
-        return self.current_time + random.expovariate(self.arrival_rate)
+        return self.current_time + self.streams.exponential(self.arrival_rate)
+    
+    def generate_service_time(self, packet=None):
+    # Generate service time using exponential distribution, unless the packet carries its own
+        if packet is not None and packet.service_demand >= 0:
+            return packet.service_demand
+        return self.streams.exponential(self.service_rate)
     
-    def generate_service_time(self):
-    # Generate service time using exponential distribution
-        return random.expovariate(self.service_rate)
+    def next_packet(self, packet_id):
+        # Packet for the next arrival
+        return Packet(arrival_time=self.generate_arrival_time(), packet_id=packet_id)
     
     def select_queue(self, packet):
         
         # Select which queue to assign packet to based on strategy
         if self.strategy == 'random':
             # Random selection
-            selected_queue = random.choice([self.queue1, self.queue2])
+            selected_queue = self.queue1 if self.streams.uniform() < 0.5 else self.queue2
             if not selected_queue.is_full():
                 return selected_queue
             # Try the other queue
@@ -153,6 +238,9 @@ class TwoQueueSimulation:
     
     def handle_arrival(self, packet):
         """Handle packet arrival event"""
+        if self.stats is not None:
+            self.stats.occupancy.advance(self.current_time, self.queue1.length(), self.queue2.length())
+        
         self.packets_offered += 1
         
         # Sample queue lengths at arrival time
@@ -166,6 +254,8 @@ class TwoQueueSimulation:
         if selected_queue is None:
             # Packet dropped
             self.packets_dropped += 1
+            if self.trace is not None:
+                self.trace.record(packet)
         else:
             # Packet admitted
             self.packets_admitted += 1
@@ -177,7 +267,7 @@ class TwoQueueSimulation:
                 served_packet = selected_queue.start_service(self.current_time)
                 if served_packet:
                     # Schedule departure event
-                    service_time = self.generate_service_time()
+                    service_time = self.generate_service_time(served_packet)
                     departure_time = self.current_time + service_time
                     departure_event = Event(
                         time=departure_time,
@@ -190,6 +280,8 @@ class TwoQueueSimulation:
     def handle_departure(self, event):
         # Handle packet departure event
         queue = self.queue1 if event.queue_id == 0 else self.queue2
+        if self.stats is not None:
+            self.stats.occupancy.advance(self.current_time, self.queue1.length(), self.queue2.length())
         
         # Finish service
         departed_packet = queue.finish_service(self.current_time)
@@ -201,11 +293,15 @@ class TwoQueueSimulation:
             sojourn_time = departed_packet.departure_time - departed_packet.arrival_time
             self.total_sojourn_time += sojourn_time
             self.sojourn_time_samples += 1
+            if self.stats is not None:
+                self.stats.sojourn.add(sojourn_time)
+            if self.trace is not None:
+                self.trace.record(departed_packet)
             
             # Start service for next packet in queue if any
             next_packet = queue.start_service(self.current_time)
             if next_packet:
-                service_time = self.generate_service_time()
+                service_time = self.generate_service_time(next_packet)
                 departure_time = self.current_time + service_time
                 departure_event = Event(
                     time=departure_time,
@@ -215,23 +311,35 @@ class TwoQueueSimulation:
                 )
                 self.schedule_event(departure_event)
     
-    def run(self, num_packets=10000):
+    def run(self, num_packets=10000, snapshot_path=None, snapshot_every=None):
         #Run simulation for specified number of offered packets
-        # Schedule initial arrival
-        next_arrival_time = self.generate_arrival_time()
-        first_packet = Packet(arrival_time=next_arrival_time, packet_id=0)
-        self.schedule_event(Event(
-            time=next_arrival_time,
-            event_type='arrival',
-            packet=first_packet
-        ))
-        
-        packet_id = 1
+        # With snapshot_path, the state is saved there every snapshot_every offered packets;
+        # a simulation from load_state continues where its snapshot was taken
+        if self._resuming:
+            packet_id = self.next_packet_id
+            self._resuming = False
+        elif num_packets < 1:
+            # Nothing to offer, as in every other engine
+            packet_id = 0
+        else:
+            # Schedule initial arrival
+            first_packet = self.next_packet(0)
+            self.schedule_event(Event(
+                time=first_packet.arrival_time,
+                event_type='arrival',
+                packet=first_packet
+            ))
+            packet_id = 1
+        snapshot_every = snapshot_every if snapshot_path else None
+        instrument = self.instrumentation
         
         # Main event loop
         while self.event_queue:
             # Get next event
-            event = heapq.heappop(self.event_queue)
+            if instrument is None:
+                event = heapq.heappop(self.event_queue)
+            else:
+                event = instrument.next_event(self)
             self.current_time = event.time
             
             if event.event_type == 'arrival':
@@ -239,11 +347,10 @@ class TwoQueueSimulation:
                 
                 # Schedule next arrival if we haven't generated enough packets
                 if self.packets_offered < num_packets:
-                    next_arrival_time = self.generate_arrival_time()
-                    next_packet = Packet(arrival_time=next_arrival_time, packet_id=packet_id)
+                    next_packet = self.next_packet(packet_id)
                     packet_id += 1
                     self.schedule_event(Event(
-                        time=next_arrival_time,
+                        time=next_packet.arrival_time,
                         event_type='arrival',
                         packet=next_packet
                     ))
@@ -254,17 +361,178 @@ class TwoQueueSimulation:
             # Stop if we've offered enough packets and all admitted packets have departed
             if self.packets_offered >= num_packets and self.packets_departed >= self.packets_admitted:
                 break
+            
+            if snapshot_every and event.event_type == 'arrival' and self.packets_offered % snapshot_every == 0:
+                self.next_packet_id = packet_id
+                self.save_state(snapshot_path)
+        
+        self.next_packet_id = packet_id
+        if self.trace is not None:
+            self.trace.flush()
+        if instrument is not None:
+            instrument.finish(self)
         
         # Calculate final metrics
         return self.get_metrics()
     
+    def save_state(self, path):
+        # Write the complete simulation state (queues, pending events, counters,
+        # RNG state and its unused variates) to a compressed .npz at path.
+        # The file is replaced atomically, so a crash mid-write keeps the old snapshot.
+        if type(self) is not TwoQueueSimulation:
+            raise TypeError(f"{type(self).__name__} does not support snapshots; "
+                            "only the event engine (TwoQueueSimulation) does")
+        
+        # Every live packet once; queues and events refer to packets by row
+        packets = []
+        rows = {}
+        def ref(packet):
+            if packet is None:
+                return -1
+            if id(packet) not in rows:
+                rows[id(packet)] = len(packets)
+                packets.append(packet)
+            return rows[id(packet)]
+        
+        queues = (self.queue1, self.queue2)
+        waiting = [[ref(packet) for packet in queue.packets] for queue in queues]
+        in_service = [ref(queue.packet_in_service) for queue in queues]
+        # The heap list is saved as is, so the resumed heap pops in the same order
+        events = [(event.time, event.event_type == 'departure', event.queue_id, ref(event.packet))
+                  for event in self.event_queue]
+        
+        streams = self.streams
+        settings = {
+            'version': SNAPSHOT_VERSION,
+            'arrival_rate': self.arrival_rate,
+            'service_rate': self.service_rate,
+            'strategy': self.strategy,
+            'queue_capacity': self.queue_capacity,
+            'bit_generator': streams.generator.bit_generator.state,
+            'block_size': streams.block_size,
+            'exp_cursor': streams._exp_cursor,
+            'unif_cursor': streams._unif_cursor,
+            'server_busy': [queue.server_busy for queue in queues],
+            'in_service': in_service,
+            'waiting_counts': [len(w) for w in waiting],
+            'current_time': self.current_time,
+            'packets_offered': self.packets_offered,
+            'packets_dropped': self.packets_dropped,
+            'packets_admitted': self.packets_admitted,
+            'packets_departed': self.packets_departed,
+            'total_queue_length_samples': self.total_queue_length_samples,
+            'queue_length_sum': self.queue_length_sum,
+            'total_sojourn_time': self.total_sojourn_time,
+            'sojourn_time_samples': self.sojourn_time_samples,
+            'next_packet_id': self.next_packet_id
+        }
+        stats_arrays = {}
+        if self.stats is not None:
+            # Plain arrays and numbers, never a pickle, so loading runs no code
+            sojourn = self.stats.sojourn.__getstate__()
+            occupancy = self.stats.occupancy.__getstate__()
+            settings['stats'] = {
+                'relative_accuracy': sojourn['relative_accuracy'],
+                'zero_count': sojourn['zero_count'],
+                'count': sojourn['count'],
+                'last_time': occupancy['last_time']
+            }
+            stats_arrays = {
+                'stats_indices': sojourn['indices'],
+                'stats_counts': sojourn['counts'],
+                'stats_time_at_length': occupancy['time_at_length']
+            }
+        arrays = {
+            'settings': np.frombuffer(json.dumps(settings).encode(), dtype=np.uint8),
+            'packet_times': np.array([(p.arrival_time, p.service_start_time, p.departure_time, p.service_demand)
+                                      for p in packets], dtype=float).reshape(-1, 4),
+            'packet_ids': np.array([(p.packet_id, p.queue_assigned) for p in packets],
+                                   dtype=np.int64).reshape(-1, 2),
+            'waiting': np.array(waiting[0] + waiting[1], dtype=np.int64),
+            'event_times': np.array([e[0] for e in events], dtype=float),
+            'event_fields': np.array([e[1:] for e in events], dtype=np.int64).reshape(-1, 3),
+            'exponentials': np.array(streams._exponentials, dtype=float),
+            'uniforms': np.array(streams._uniforms, dtype=float)
+        }
+        arrays.update(stats_arrays)
+        
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temporary, path)
+    
+    @classmethod
+    def load_state(cls, path, reseed=None, trace=None, instrument=None):
+        # Simulation restored from save_state; call run() with the same num_packets to finish it.
+        # reseed gives the continuation fresh random streams (seed or SeedSequence), so one
+        # warmed-up snapshot can be forked into independent continuations.
+        if cls is not TwoQueueSimulation:
+            raise TypeError(f"{cls.__name__} does not support snapshots; "
+                            "only the event engine (TwoQueueSimulation) does")
+        with np.load(path) as data:
+            settings = json.loads(data['settings'].tobytes().decode())
+            if settings['version'] != SNAPSHOT_VERSION:
+                raise ValueError(f"Snapshot version {settings['version']} is not supported")
+            sim = cls(settings['arrival_rate'], settings['service_rate'], strategy=settings['strategy'],
+                      seed=reseed, queue_capacity=settings['queue_capacity'], trace=trace, instrument=instrument)
+            
+            packets = [Packet(arrival_time=float(times[0]), packet_id=int(ids[0]), queue_assigned=int(ids[1]),
+                              service_start_time=float(times[1]), departure_time=float(times[2]),
+                              service_demand=float(times[3]))
+                       for times, ids in zip(data['packet_times'], data['packet_ids'])]
+            def packet(row):
+                return packets[row] if row >= 0 else None
+            
+            waiting = data['waiting'].tolist()
+            split = settings['waiting_counts'][0]
+            for queue, busy, row, rows in zip((sim.queue1, sim.queue2), settings['server_busy'],
+                                              settings['in_service'], (waiting[:split], waiting[split:])):
+                queue.server_busy = busy
+                queue.packet_in_service = packet(row)
+                queue.packets = [packets[r] for r in rows]
+            
+            sim.event_queue = [Event(time=float(time), event_type='departure' if departure else 'arrival',
+                                     queue_id=int(queue_id), packet=packet(row))
+                               for time, (departure, queue_id, row) in
+                               zip(data['event_times'], data['event_fields'].tolist())]
+            
+            if reseed is None:
+                streams = sim.streams
+                streams.block_size = settings['block_size']
+                streams.generator.bit_generator.state = settings['bit_generator']
+                streams._exponentials = data['exponentials'].tolist()
+                streams._exp_cursor = settings['exp_cursor']
+                streams._uniforms = data['uniforms'].tolist()
+                streams._unif_cursor = settings['unif_cursor']
+            if 'stats' in settings:
+                stats = settings['stats']
+                time_at_length = data['stats_time_at_length']
+                sim.stats = StreamingStats(time_at_length.shape[0], time_at_length.shape[1] - 1,
+                                           stats['relative_accuracy'])
+                sim.stats.sojourn.__setstate__({
+                    'relative_accuracy': stats['relative_accuracy'],
+                    'indices': data['stats_indices'],
+                    'counts': data['stats_counts'],
+                    'zero_count': stats['zero_count'],
+                    'count': stats['count']
+                })
+                sim.stats.occupancy.__setstate__({'time_at_length': time_at_length,
+                                                  'last_time': stats['last_time']})
+        
+        for name in ('current_time', 'packets_offered', 'packets_dropped', 'packets_admitted', 'packets_departed',
+                     'total_queue_length_samples', 'queue_length_sum', 'total_sojourn_time',
+                     'sojourn_time_samples', 'next_packet_id'):
+            setattr(sim, name, settings[name])
+        sim._resuming = True
+        return sim
+    
     def get_metrics(self):
         #Calculate and return performance metrics
         blocking_prob = self.packets_dropped / self.packets_offered if self.packets_offered > 0 else 0
         avg_queue_length = self.queue_length_sum / self.total_queue_length_samples if self.total_queue_length_samples > 0 else 0
         avg_sojourn_time = self.total_sojourn_time / self.sojourn_time_samples if self.sojourn_time_samples > 0 else 0
         
-        return {
+        metrics = {
             'blocking_probability': blocking_prob,
             'average_queue_length': avg_queue_length,
             'average_sojourn_time': avg_sojourn_time,
@@ -273,28 +541,433 @@ class TwoQueueSimulation:
             'packets_admitted': self.packets_admitted,
             'packets_departed': self.packets_departed
         }
+        if self.stats is not None:
+            metrics.update(self.stats.metrics())
+        return metrics
 
 
-def run_multiple_simulations(arrival_rate, service_rate, strategy, num_runs=10, num_packets=10000):
-    
-    # Run multiple independent simulations and average results
-    
-    blocking_probs = []
-    avg_queue_lengths = []
-    avg_sojourn_times = []
-    
-    for run in range(num_runs):
-        sim = TwoQueueSimulation(
+class RingBufferQueue:
+    # Metrics-only queue: a fixed-size ring buffer of arrival times.
+    # The packet at the head is the one in service.
+    __slots__ = ('capacity', 'queue_id', 'arrival_times', 'head', 'count')
+
+    def __init__(self, capacity=10, queue_id=0):
+        self.capacity = capacity
+        self.queue_id = queue_id
+        self.arrival_times = [0.0] * capacity
+        self.head = 0
+        self.count = 0
+
+    def length(self):
+        return self.count
+
+    def is_full(self):
+        return self.count >= self.capacity
+
+    @property
+    def server_busy(self):
+        return self.count > 0
+
+    def push(self, arrival_time):
+        # Append an arrival time; caller checks capacity
+        self.arrival_times[(self.head + self.count) % self.capacity] = arrival_time
+        self.count += 1
+
+    def peek(self):
+        # Arrival time of the packet in service
+        return self.arrival_times[self.head]
+
+    def pop(self):
+        # Remove the packet in service and return its arrival time
+        arrival_time = self.arrival_times[self.head]
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+        return arrival_time
+
+
+def dispatch_table(capacity):
+    # select_queue's rules as a lookup table for the ring-buffer engines:
+    # table[first][len1][len2] is queue `first` if it has room, else the other
+    # queue if it has room, else -1 (both full). 'random' looks up with its
+    # coin flip as `first`; 'min_queue' with the shorter queue (queue 0 on
+    # ties), which gives exactly select_queue's choice for both strategies.
+    lengths = range(capacity + 1)
+    return [[[first if (len1, len2)[first] < capacity else
+              1 - first if (len1, len2)[1 - first] < capacity else -1
+              for len2 in lengths] for len1 in lengths] for first in (0, 1)]
+
+
+class FastTwoQueueSimulation(TwoQueueSimulation):
+    # Metrics-only version of TwoQueueSimulation.
+    # No Packet or Event objects are created: queues are RingBufferQueues and
+    # the event heap holds (time, queue_id) tuples, with queue_id -1 for the
+    # next arrival. Random variates are consumed in the same order as the
+    # reference engine, so the metrics are identical for the same seed.
+
+    def __init__(self, arrival_rate, service_rate, strategy='random', seed=None, queue_capacity=10,
+                 track_distributions=False):
+        super().__init__(arrival_rate, service_rate, strategy=strategy, seed=seed,
+                         queue_capacity=queue_capacity, track_distributions=track_distributions)
+        self.queue1 = RingBufferQueue(capacity=queue_capacity, queue_id=0)
+        self.queue2 = RingBufferQueue(capacity=queue_capacity, queue_id=1)
+        self.dispatch_targets = dispatch_table(queue_capacity)
+
+    def run(self, num_packets=10000):
+        #Run simulation for specified number of offered packets
+        if self.strategy not in ('random', 'min_queue'):
+            raise ValueError(f"Unknown strategy '{self.strategy}'")
+        random_strategy = self.strategy == 'random'
+        targets = self.dispatch_targets
+        arrival_rate = self.arrival_rate
+        service_rate = self.service_rate
+        exponential = self.streams.exponential
+        uniform = self.streams.uniform
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        queues = (self.queue1, self.queue2)
+        stats = self.stats
+        if stats is not None:
+            advance = stats.occupancy.advance
+            add_sojourn = stats.sojourn.add
+
+        offered = dropped = admitted = departed = 0
+        queue_length_sum = 0.0
+        total_sojourn_time = 0.0
+        now = self.current_time
+
+        events = self.event_queue
+        if num_packets >= 1:
+            heappush(events, (now + exponential(arrival_rate), -1))
+
+        while events:
+            now, queue_id = heappop(events)
+            if stats is not None:
+                advance(now, queues[0].count, queues[1].count)
+
+            if queue_id < 0:
+                offered += 1
+                len1 = queues[0].count
+                len2 = queues[1].count
+                queue_length_sum += (len1 + len2) / 2.0
+
+                # Same decision rules as select_queue, via dispatch_table
+                if random_strategy:
+                    first = 0 if uniform() < 0.5 else 1
+                else:
+                    first = 0 if len1 <= len2 else 1
+                target = targets[first][len1][len2]
+
+                if target < 0:
+                    dropped += 1
+                else:
+                    admitted += 1
+                    queue = queues[target]
+                    queue.push(now)
+                    if queue.count == 1:
+                        heappush(events, (now + exponential(service_rate), target))
+
+                if offered < num_packets:
+                    heappush(events, (now + exponential(arrival_rate), -1))
+
+            else:
+                queue = queues[queue_id]
+                sojourn_time = now - queue.pop()
+                total_sojourn_time += sojourn_time
+                departed += 1
+                if stats is not None:
+                    add_sojourn(sojourn_time)
+                if queue.count:
+                    heappush(events, (now + exponential(service_rate), queue_id))
+
+            if offered >= num_packets and departed >= admitted:
+                break
+
+        self.current_time = now
+        self.packets_offered = offered
+        self.packets_dropped = dropped
+        self.packets_admitted = admitted
+        self.packets_departed = departed
+        self.queue_length_sum = queue_length_sum
+        self.total_queue_length_samples = offered
+        self.total_sojourn_time = total_sojourn_time
+        self.sojourn_time_samples = departed
+
+        return self.get_metrics()
+
+
+class CalendarTwoQueueSimulation(FastTwoQueueSimulation):
+    # Metrics-only engine with a fixed three-slot event calendar.
+    # At most three events are ever pending: the next arrival and one
+    # departure per busy server. Their times sit in a list (inf when a slot is
+    # empty) and the next event is the smallest slot, so there is no heap.
+    # Results are identical to TwoQueueSimulation for the same seed.
+
+    def __init__(self, arrival_rate, service_rate, strategy='random', seed=None, queue_capacity=10,
+                 track_distributions=False):
+        super().__init__(arrival_rate, service_rate, strategy=strategy, seed=seed,
+                         queue_capacity=queue_capacity, track_distributions=track_distributions)
+        # Slot 0: next arrival, slots 1-2: departures from queue 1 and queue 2.
+        # None until the first arrival is drawn.
+        self.calendar = None
+
+    def run(self, num_packets=10000):
+        #Run simulation for specified number of offered packets
+        return self.advance(num_packets, drain=True)
+
+    def advance(self, num_packets, drain=False):
+        # Process events until num_packets packets have been offered in total.
+        # With drain=True arrivals stop there and every admitted packet is
+        # served, exactly like run(). Otherwise the run pauses right after that
+        # arrival with the next one already scheduled, and can be continued
+        # by calling advance again.
+        if self.strategy not in ('random', 'min_queue'):
+            raise ValueError(f"Unknown strategy '{self.strategy}'")
+        random_strategy = self.strategy == 'random'
+        targets = self.dispatch_targets
+        arrival_rate = self.arrival_rate
+        service_rate = self.service_rate
+        exponential = self.streams.exponential
+        uniform = self.streams.uniform
+        queues = (self.queue1, self.queue2)
+        inf = float('inf')
+        stats = self.stats
+        if stats is not None:
+            advance = stats.occupancy.advance
+            add_sojourn = stats.sojourn.add
+
+        offered = self.packets_offered
+        dropped = self.packets_dropped
+        admitted = self.packets_admitted
+        departed = self.packets_departed
+        queue_length_sum = self.queue_length_sum
+        total_sojourn_time = self.total_sojourn_time
+        now = self.current_time
+
+        if self.calendar is None:
+            self.calendar = [now + exponential(arrival_rate), inf, inf]
+        calendar = self.calendar
+        if offered >= num_packets:
+            if not drain:
+                return self.get_metrics()
+            calendar[0] = inf
+
+        while True:
+            arrival_time, departure1, departure2 = calendar
+            if arrival_time <= departure1 and arrival_time <= departure2:
+                slot = 0
+                now = arrival_time
+            elif departure1 <= departure2:
+                slot = 1
+                now = departure1
+            else:
+                slot = 2
+                now = departure2
+            if now == inf:
+                now = self.current_time
+                break
+            if stats is not None:
+                advance(now, queues[0].count, queues[1].count)
+
+            if slot == 0:
+                offered += 1
+                len1 = queues[0].count
+                len2 = queues[1].count
+                queue_length_sum += (len1 + len2) / 2.0
+
+                # Same decision rules as select_queue, via dispatch_table
+                if random_strategy:
+                    first = 0 if uniform() < 0.5 else 1
+                else:
+                    first = 0 if len1 <= len2 else 1
+                target = targets[first][len1][len2]
+
+                if target < 0:
+                    dropped += 1
+                else:
+                    admitted += 1
+                    queue = queues[target]
+                    queue.push(now)
+                    if queue.count == 1:
+                        calendar[1 + target] = now + exponential(service_rate)
+
+                if offered < num_packets or not drain:
+                    calendar[0] = now + exponential(arrival_rate)
+                    if offered >= num_packets:
+                        break
+                else:
+                    calendar[0] = inf
+
+            else:
+                queue = queues[slot - 1]
+                sojourn_time = now - queue.pop()
+                total_sojourn_time += sojourn_time
+                departed += 1
+                if stats is not None:
+                    add_sojourn(sojourn_time)
+                if queue.count:
+                    calendar[slot] = now + exponential(service_rate)
+                else:
+                    calendar[slot] = inf
+
+            if offered >= num_packets and departed >= admitted:
+                break
+
+        self.current_time = now
+        self.packets_offered = offered
+        self.packets_dropped = dropped
+        self.packets_admitted = admitted
+        self.packets_departed = departed
+        self.queue_length_sum = queue_length_sum
+        self.total_queue_length_samples = offered
+        self.total_sojourn_time = total_sojourn_time
+        self.sojourn_time_samples = departed
+
+        return self.get_metrics()
+
+
+# Columns of the per-replication result arrays
+METRIC_FIELDS = (
+    'blocking_probability',
+    'average_queue_length',
+    'average_sojourn_time',
+    'packets_offered',
+    'packets_dropped',
+    'packets_admitted',
+    'packets_departed'
+)
+
+
+# Engines that produce identical metrics for the same seed, by name
+ENGINES = {
+    'event': TwoQueueSimulation,
+    'fast': FastTwoQueueSimulation,
+    'calendar': CalendarTwoQueueSimulation
+}
+
+
+def engine_class(engine):
+    # Simulation class for an engine name. 'jit' is the compiled kernel
+    # (pure Python without Numba); 'auto' picks it only when Numba is installed.
+    if engine in ('jit', 'auto'):
+        import jit_kernel
+        return jit_kernel.JitTwoQueueSimulation if engine == 'jit' else jit_kernel.best_engine()
+    return ENGINES[engine]
+
+
+def replication_seed(base_seed, index):
+    # Seed of replication `index`; identical to SeedSequence(base_seed).spawn(n)[index]
+    return np.random.SeedSequence(base_seed, spawn_key=(index,))
+
+
+def _run_replications(arrival_rate, service_rate, strategy, num_packets, base_seed, indices,
+                      queue_capacity=10, engine='event', track_distributions=False):
+    # Worker task: run the given replications and return one metrics row each,
+    # plus each replication's StreamingStats when tracking distributions
+    rows = np.empty((len(indices), len(METRIC_FIELDS)))
+    stats = [] if track_distributions else None
+    for row, index in enumerate(indices):
+        sim = engine_class(engine)(
             arrival_rate=arrival_rate,
             service_rate=service_rate,
             strategy=strategy,
-            seed=run  # Different seed for each run
+            seed=replication_seed(base_seed, index),
+            queue_capacity=queue_capacity,
+            track_distributions=track_distributions
         )
         metrics = sim.run(num_packets=num_packets)
-        
-        blocking_probs.append(metrics['blocking_probability'])
-        avg_queue_lengths.append(metrics['average_queue_length'])
-        avg_sojourn_times.append(metrics['average_sojourn_time'])
+        rows[row] = [metrics[field] for field in METRIC_FIELDS]
+        if track_distributions:
+            stats.append(sim.stats)
+    return rows, stats
+
+
+def executor_capacity(executor, workers):
+    # How many tasks to plan for running at once: the executor's own size when
+    # it reports one (ProcessPoolExecutor, cluster.ClusterExecutor), else
+    # workers. None means unknown (a cluster started without max_workers).
+    if executor is None:
+        return workers
+    if hasattr(executor, 'max_workers'):
+        return executor.max_workers
+    return getattr(executor, '_max_workers', workers)
+
+
+def _compute_replications(arrival_rate, service_rate, strategy, num_packets, base_seed, indices,
+                          queue_capacity, workers, executor, engine, track_distributions=False):
+    # Rows (and per-replication stats) for the given replication indices,
+    # inline or on an executor
+    if executor is None and workers <= 1:
+        return _run_replications(arrival_rate, service_rate, strategy, num_packets, base_seed, indices,
+                                 queue_capacity, engine, track_distributions)
+    
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return _compute_replications(arrival_rate, service_rate, strategy, num_packets, base_seed,
+                                         indices, queue_capacity, workers, pool, engine,
+                                         track_distributions)
+    
+    # A few chunks per worker keeps the pool busy without per-task overhead;
+    # one replication per chunk when the executor's size is unknown
+    capacity = executor_capacity(executor, workers)
+    num_chunks = len(indices) if capacity is None else max(1, min(len(indices), 4 * max(capacity, 1)))
+    positions = list(range(len(indices)))
+    chunks = [positions[k::num_chunks] for k in range(num_chunks)]
+    futures = [
+        executor.submit(_run_replications, arrival_rate, service_rate, strategy,
+                        num_packets, base_seed, [indices[p] for p in chunk], queue_capacity, engine,
+                        track_distributions)
+        for chunk in chunks
+    ]
+    
+    rows = np.empty((len(indices), len(METRIC_FIELDS)))
+    stats = [None] * len(indices) if track_distributions else None
+    for chunk, future in zip(chunks, futures):
+        chunk_rows, chunk_stats = future.result()
+        rows[chunk] = chunk_rows
+        if track_distributions:
+            for position, replication_stats in zip(chunk, chunk_stats):
+                stats[position] = replication_stats
+    return rows, stats
+
+
+def run_replications(arrival_rate, service_rate, strategy, num_runs=10, num_packets=10000,
+                     base_seed=0, workers=1, executor=None, queue_capacity=10, cache=True,
+                     engine='event'):
+    
+    # Run num_runs replications and return a (num_runs, len(METRIC_FIELDS)) array.
+    # Each replication has its own spawned seed, so the rows do not depend on
+    # how the work is split across processes. Replications already in the
+    # result cache are read back instead of being simulated again.
+    
+    rows = np.empty((num_runs, len(METRIC_FIELDS)))
+    missing = list(range(num_runs))
+    
+    cache = resolve_cache(cache)
+    if cache is not None:
+        key = cache.key(ENGINE_VERSION, arrival_rate, service_rate, strategy,
+                        queue_capacity, num_packets, base_seed)
+        cached = cache.load(key, METRIC_FIELDS)
+        for index in range(num_runs):
+            if index in cached:
+                rows[index] = cached[index]
+        missing = [index for index in missing if index not in cached]
+    
+    if missing:
+        computed, _ = _compute_replications(arrival_rate, service_rate, strategy, num_packets, base_seed,
+                                            missing, queue_capacity, workers, executor, engine)
+        rows[missing] = computed
+        if cache is not None:
+            cache.store(key, METRIC_FIELDS, missing, computed)
+    return rows
+
+
+def summarize_replications(rows):
+    # Mean and standard deviation of the per-replication metric rows
+    rows = np.asarray(rows)
+    blocking_probs = rows[:, 0]
+    avg_queue_lengths = rows[:, 1]
+    avg_sojourn_times = rows[:, 2]
     
     return {
         'blocking_probability': np.mean(blocking_probs),
@@ -304,3 +977,52 @@ def run_multiple_simulations(arrival_rate, service_rate, strategy, num_runs=10,
         'average_queue_length_std': np.std(avg_queue_lengths),
         'average_sojourn_time_std': np.std(avg_sojourn_times)
     }
+
+
+def run_multiple_simulations(arrival_rate, service_rate, strategy, num_runs=10, num_packets=10000,
+                             engine='event', workers=1, executor=None, base_seed=0,
+                             queue_capacity=10, cache=True, track_distributions=False):
+    
+    # Run multiple independent simulations and average results
+    # engine='fast', 'calendar' and 'jit' give the same results as 'event', faster;
+    # engine='auto' picks the fastest of them that is available
+    # engine='exact' solves the Markov chain instead of simulating (std is 0)
+    # workers/executor fan event-engine replications out to a process pool
+    # cache=True reuses replications stored by earlier runs (see result_cache)
+    # track_distributions=True adds sojourn percentiles and per-queue occupancy,
+    # merged across replications (these runs bypass the cache)
+    
+    if track_distributions and engine not in ENGINES:
+        raise ValueError(f"track_distributions is not supported by engine '{engine}'")
+    
+    if engine == 'exact':
+        from ctmc_solver import exact_metrics
+        metrics = exact_metrics(arrival_rate, service_rate, strategy, queue_capacity, num_packets)
+        rows = np.array([[metrics[field] for field in METRIC_FIELDS]])
+        return summarize_replications(rows)
+    
+    if track_distributions:
+        rows, stats = _compute_replications(arrival_rate, service_rate, strategy, num_packets, base_seed,
+                                            list(range(num_runs)), queue_capacity, workers, executor,
+                                            engine, track_distributions=True)
+        merged = StreamingStats(2, queue_capacity)
+        for replication_stats in stats:
+            merged.merge(replication_stats)
+        summary = summarize_replications(rows)
+        summary.update(merged.metrics())
+        return summary
+    
+    rows = run_replications(
+        arrival_rate=arrival_rate,
+        service_rate=service_rate,
+        strategy=strategy,
+        num_runs=num_runs,
+        num_packets=num_packets,
+        base_seed=base_seed,
+        workers=workers,
+        executor=executor,
+        queue_capacity=queue_capacity,
+        cache=cache,
+        engine=engine
+    )
+    return summarize_replications(rows)
@@ -0,0 +1,225 @@
+#Precomputed response surface for instant metric lookups.
+#Metrics of both strategies are simulated on a log-spaced (λ, μ) grid over
+#the GUI slider ranges and saved to one .npz file. Lookups interpolate
+#bilinearly in (log λ, log μ) and report an uncertainty that combines the
+#Monte Carlo standard error with an estimate of the interpolation error.
+#Cells whose interpolation error is too large are split into four on demand
+#(a quadtree per base cell), so accuracy is added only where the surface bends.
+
+import math
+import os
+import threading
+
+import numpy as np
+
+from queue_simulation import ENGINE_VERSION, METRIC_FIELDS
+from result_cache import default_cache_dir
+from sweep import STRATEGIES, execute_plan, plan_sweep
+
+
+SURFACE_METRICS = METRIC_FIELDS[:3]
+RATE_RANGE = (0.1, 10.0)  # slider range for both λ and μ
+MAX_DEPTH = 4             # a base cell is split at most this many times
+
+
+def default_surface_path():
+    # In its own subdirectory, so clearing or evicting the result cache never removes it
+    return os.path.join(default_cache_dir(), 'surface', 'response_surface.npz')
+
+
+def _key(x):
+    # Log coordinates as dictionary keys
+    return round(float(x), 9)
+
+
+class ResponseSurface:
+    # Interpolated metrics for (λ, μ, strategy).
+    # samples[(strategy, x, y)] holds (mean, standard error) vectors over
+    # SURFACE_METRICS at x = log λ, y = log μ. splits holds the quadtree nodes
+    # (strategy, x0, y0, x1, y1) that have been divided into four children.
+
+    def __init__(self, xs, ys, samples, splits=(), num_runs=10, num_packets=10000, queue_capacity=10,
+                 base_seed=0):
+        self.xs = np.asarray(xs, dtype=float)
+        self.ys = np.asarray(ys, dtype=float)
+        self.samples = dict(samples)
+        self.splits = set(splits)
+        self.num_runs = num_runs
+        self.num_packets = num_packets
+        self.queue_capacity = queue_capacity
+        self.base_seed = base_seed
+        self.lock = threading.Lock()  # lookups may run while a refinement is committed
+        self.base_errors = {strategy: self._curvature_errors(strategy) for strategy in STRATEGIES}
+
+    # Construction and storage
+
+    @classmethod
+    def build(cls, grid_size=25, num_runs=10, num_packets=10000, queue_capacity=10, base_seed=0,
+              workers=None, executor=None, progress=None):
+        # Simulate the full base grid (both strategies) through the sweep planner
+        xs = np.linspace(math.log(RATE_RANGE[0]), math.log(RATE_RANGE[1]), grid_size)
+        surface = cls(xs, xs, {}, num_runs=num_runs, num_packets=num_packets,
+                      queue_capacity=queue_capacity, base_seed=base_seed)
+        points = [(x, y) for x in xs for y in xs]
+        for strategy in STRATEGIES:
+            surface.samples.update(surface._simulate(points, strategy, workers, executor, progress))
+        surface.base_errors = {strategy: surface._curvature_errors(strategy) for strategy in STRATEGIES}
+        return surface
+
+    def save(self, path=None):
+        path = path or default_surface_path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        keys = sorted(self.samples)
+        strategies = np.array([STRATEGIES.index(strategy) for strategy, _, _ in keys], dtype=np.int8)
+        coordinates = np.array([(x, y) for _, x, y in keys], dtype=float).reshape(-1, 2)
+        means = np.array([self.samples[key][0] for key in keys], dtype=float).reshape(-1, len(SURFACE_METRICS))
+        errors = np.array([self.samples[key][1] for key in keys], dtype=float).reshape(-1, len(SURFACE_METRICS))
+        splits = sorted(self.splits)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                xs=self.xs, ys=self.ys,
+                sample_strategy=strategies, sample_xy=coordinates, sample_mean=means, sample_stderr=errors,
+                split_strategy=np.array([STRATEGIES.index(s[0]) for s in splits], dtype=np.int8),
+                split_box=np.array([s[1:] for s in splits], dtype=float).reshape(-1, 4),
+                settings=np.array([self.num_runs, self.num_packets, self.queue_capacity, self.base_seed,
+                                   ENGINE_VERSION], dtype=np.int64)
+            )
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        # Raises ValueError for a surface built by a different engine version
+        with np.load(path or default_surface_path()) as data:
+            num_runs, num_packets, queue_capacity, base_seed, engine_version = data['settings'].tolist()
+            if engine_version != ENGINE_VERSION:
+                raise ValueError(f"Response surface was built by engine version {engine_version}, "
+                                 f"not {ENGINE_VERSION}; rebuild it with 'python main.py surface'")
+            samples = {}
+            for strategy, (x, y), mean, stderr in zip(data['sample_strategy'], data['sample_xy'],
+                                                      data['sample_mean'], data['sample_stderr']):
+                samples[(STRATEGIES[strategy], _key(x), _key(y))] = (mean, stderr)
+            splits = [(STRATEGIES[strategy],) + tuple(_key(v) for v in box)
+                      for strategy, box in zip(data['split_strategy'], data['split_box'])]
+            return cls(data['xs'], data['ys'], samples, splits, num_runs=num_runs, num_packets=num_packets,
+                       queue_capacity=queue_capacity, base_seed=base_seed)
+
+    # Lookup
+
+    def lookup(self, arrival_rate, service_rate, strategy):
+        # Interpolated metrics plus '<metric>_uncertainty' for each metric (one standard error scale)
+        with self.lock:
+            node, corners, weights, interpolation_error = self._leaf(arrival_rate, service_rate, strategy)
+        means = sum(w * c[0] for w, c in zip(weights, corners))
+        stderr = sum(w * c[1] for w, c in zip(weights, corners))
+        uncertainty = np.sqrt(stderr ** 2 + interpolation_error ** 2)
+        result = {}
+        for k, metric in enumerate(SURFACE_METRICS):
+            result[metric] = float(means[k])
+            result[f'{metric}_uncertainty'] = float(uncertainty[k])
+        return result
+
+    def needs_refinement(self, arrival_rate, service_rate, strategy, relative_tolerance=0.05,
+                         absolute_tolerance=1e-3):
+        # True if the interpolation error at this point is above tolerance,
+        # above the simulation noise, and the cell can still be split
+        with self.lock:
+            node, corners, weights, interpolation_error = self._leaf(arrival_rate, service_rate, strategy)
+        if node[0] >= MAX_DEPTH:
+            return False
+        means = sum(w * c[0] for w, c in zip(weights, corners))
+        stderr = sum(w * c[1] for w, c in zip(weights, corners))
+        limit = np.maximum(relative_tolerance * np.abs(means) + absolute_tolerance, 2 * stderr)
+        return bool(np.any(interpolation_error > limit))
+
+    def refine(self, arrival_rate, service_rate, strategy, workers=None, executor=None, **tolerances):
+        # Split the cell containing the point if it needs it; returns True if it was split
+        if not self.needs_refinement(arrival_rate, service_rate, strategy, **tolerances):
+            return False
+        with self.lock:
+            (depth, x0, y0, x1, y1), _, _, _ = self._leaf(arrival_rate, service_rate, strategy)
+        xm, ym = (x0 + x1) / 2, (y0 + y1) / 2
+        new_points = [(x, y) for x, y in ((xm, ym), (xm, y0), (xm, y1), (x0, ym), (x1, ym))
+                      if (strategy, _key(x), _key(y)) not in self.samples]
+        # Simulate outside the lock so lookups keep answering meanwhile
+        samples = self._simulate(new_points, strategy, workers, executor)
+        with self.lock:
+            self.samples.update(samples)
+            self.splits.add((strategy, _key(x0), _key(y0), _key(x1), _key(y1)))
+        return True
+
+    # Internals
+
+    def _simulate(self, points, strategy, workers=None, executor=None, progress=None):
+        # Samples for log-coordinate points, run (and cached) through the sweep planner
+        rates = [(math.exp(x), math.exp(y)) for x, y in points]
+        tasks = plan_sweep(rates, num_runs=self.num_runs, num_packets=self.num_packets,
+                           capacity=self.queue_capacity, strategies=(strategy,), base_seed=self.base_seed)
+        results = execute_plan(tasks, workers=workers, executor=executor, progress=progress)
+        samples = {}
+        for (x, y), (arrival_rate, service_rate) in zip(points, rates):
+            rows = results.replications(arrival_rate, service_rate, strategy)[:, :len(SURFACE_METRICS)]
+            stderr = rows.std(axis=0, ddof=1) / math.sqrt(len(rows)) if len(rows) > 1 else np.zeros(rows.shape[1])
+            samples[(strategy, _key(x), _key(y))] = (rows.mean(axis=0), stderr)
+        return samples
+
+    def _base_grid(self, strategy):
+        return np.array([[self.samples[(strategy, _key(x), _key(y))][0] for y in self.ys] for x in self.xs])
+
+    def _curvature_errors(self, strategy):
+        # Interpolation error of each base cell from second differences of
+        # its corners: bilinear error at a cell centre is about |f_xx h^2 + f_yy k^2| / 8
+        if not self.samples:
+            return None
+        grid = self._base_grid(strategy)
+        padded = np.pad(grid, ((1, 1), (1, 1), (0, 0)), mode='edge')
+        dxx = np.abs(padded[2:, 1:-1] - 2 * grid + padded[:-2, 1:-1])
+        dyy = np.abs(padded[1:-1, 2:] - 2 * grid + padded[1:-1, :-2])
+        node = (dxx + dyy) / 8
+        return np.maximum.reduce([node[:-1, :-1], node[1:, :-1], node[:-1, 1:], node[1:, 1:]])
+
+    def _leaf(self, arrival_rate, service_rate, strategy):
+        # Quadtree leaf containing the point: ((depth, x0, y0, x1, y1), corner samples,
+        # bilinear weights, interpolation error estimate). Must hold the lock.
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}'")
+        x = min(max(math.log(arrival_rate), self.xs[0]), self.xs[-1])
+        y = min(max(math.log(service_rate), self.ys[0]), self.ys[-1])
+        i = min(max(int(np.searchsorted(self.xs, x)) - 1, 0), len(self.xs) - 2)
+        j = min(max(int(np.searchsorted(self.ys, y)) - 1, 0), len(self.ys) - 2)
+        x0, x1, y0, y1 = self.xs[i], self.xs[i + 1], self.ys[j], self.ys[j + 1]
+        error = self.base_errors[strategy][i, j]
+        depth = 0
+
+        while (strategy, _key(x0), _key(y0), _key(x1), _key(y1)) in self.splits:
+            # The error measured at the centre of this cell, scaled by h^2, bounds the children
+            xm, ym = (x0 + x1) / 2, (y0 + y1) / 2
+            corners = self._corners(strategy, x0, y0, x1, y1)
+            predicted = sum(c[0] for c in corners) / 4
+            error = np.abs(predicted - self.samples[(strategy, _key(xm), _key(ym))][0]) / 4
+            x0, x1 = (x0, xm) if x <= xm else (xm, x1)
+            y0, y1 = (y0, ym) if y <= ym else (ym, y1)
+            depth += 1
+
+        corners = self._corners(strategy, x0, y0, x1, y1)
+        tx = (x - x0) / (x1 - x0)
+        ty = (y - y0) / (y1 - y0)
+        weights = ((1 - tx) * (1 - ty), tx * (1 - ty), (1 - tx) * ty, tx * ty)
+        return (depth, x0, y0, x1, y1), corners, weights, error
+
+    def _corners(self, strategy, x0, y0, x1, y1):
+        samples = self.samples
+        return [samples[(strategy, _key(cx), _key(cy))] for cx, cy in ((x0, y0), (x1, y0), (x0, y1), (x1, y1))]
+
+
+def load_surface(path=None):
+    # The saved surface, or None if it has not been built yet or is from an older engine
+    path = path or default_surface_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        return ResponseSurface.load(path)
+    except ValueError:
+        return None
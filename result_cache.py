@@ -0,0 +1,124 @@
+#On-disk cache of per-replication simulation results.
+#Each parameter point maps to one columnar .npz file named by a hash of the
+#engine version and the point's parameters; rows inside are keyed by seed.
+
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Names of the files this cache writes; anything else in the directory is left alone
+_ENTRY_NAME = re.compile(r'[0-9a-f]{32}\.npz')
+
+
+def default_cache_dir():
+    # QUEUE_SIM_CACHE_DIR overrides the per-user cache location
+    return os.environ.get('QUEUE_SIM_CACHE_DIR',
+                          os.path.join(os.path.expanduser('~'), '.cache', 'queue_simulation'))
+
+
+class ResultCache:
+    # Content-addressed store of per-replication metric rows
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, engine_version, arrival_rate, service_rate, strategy, capacity, num_packets, base_seed):
+        # Hash of everything that determines a replication's results except its index
+        params = [engine_version, round(float(arrival_rate), 10), round(float(service_rate), 10),
+                  strategy, int(capacity), int(num_packets), int(base_seed)]
+        return hashlib.sha256(json.dumps(params).encode()).hexdigest()[:32]
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def load(self, key, fields):
+        # Return {replication index: row} for every cached replication of this point
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                if tuple(data['fields']) != tuple(fields):
+                    return {}
+                columns = np.column_stack([data[field] for field in fields])
+                indices = data['index']
+        except (OSError, KeyError, ValueError):
+            return {}
+
+        # Touch the file so eviction sees it as recently used
+        os.utime(path)
+        return {int(index): row for index, row in zip(indices, columns)}
+
+    def store(self, key, fields, indices, rows):
+        # Merge new replication rows into the point's file
+        entries = self.load(key, fields)
+        for index, row in zip(indices, rows):
+            entries[int(index)] = np.asarray(row, dtype=float)
+
+        order = sorted(entries)
+        table = np.array([entries[index] for index in order]).reshape(len(order), len(fields))
+        columns = {field: table[:, k] for k, field in enumerate(fields)}
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, index=np.array(order, dtype=np.int64), fields=np.array(fields), **columns)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            if _ENTRY_NAME.fullmatch(name):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        # Total bytes used by cached points
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        # Remove least recently used points until the cache fits in max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        # Invalidate every cached result
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def resolve_cache(cache):
+    # Map a cache argument to a ResultCache or None.
+    # True selects the default cache unless QUEUE_SIM_CACHE=0 switches it off.
+    if isinstance(cache, ResultCache):
+        return cache
+    if cache and os.environ.get('QUEUE_SIM_CACHE', '1') != '0':
+        return ResultCache()
+    return None
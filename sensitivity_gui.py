@@ -1,124 +1,98 @@
 ##AI Generated the start of this file in order to support dynamic input adjustment and performance monitoring.
-#Human edited to create sensitivity_gui.py and remove unrelated code/ fix issues 
+#Human edited to create sensitivity_gui.py and remove unrelated code/ fix issues
 #this code supported analysis of sensitivity to input parameters.
-
-import tkinter as tk
-from tkinter import messagebox
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from queue_simulation import TwoQueueSimulation
-import random
-import heapq
-
-
-class TwoQueueSimulation:
-    """Discrete-event simulation for a two-queue system."""
-
-    def __init__(self, arrival_rate, service_rate, strategy, simulation_time=10000, max_queue_size=10):
-        # Initialize the simulation parameters
-        self.arrival_rate = arrival_rate
-        self.service_rate = service_rate
-        self.strategy = strategy
-        self.simulation_time = simulation_time  # Added simulation_time
-        self.max_queue_size = max_queue_size
-
-        # Initialize statistics
-        self.current_time = 0.0
-        self.total_arrivals = 0
-        self.blocked_packets = 0
-        self.total_queue_length = [0, 0]  # For both queues
-        self.total_sojourn_time = 0
-        self.total_served_packets = 0
-
-        # Initialize queues and event list
-        self.queues = [0, 0]  # Queue lengths for the two queues
-        self.event_queue = []  # Priority queue for events (arrival or departure)
-
-    def select_queue(self):
-        """Select which queue to assign a packet to based on the strategy."""
-        if self.strategy == "random":
-            # Randomly select a queue
-            return random.choice([0, 1])
-        elif self.strategy == "min-queue":
-            # Select the queue with the minimum length
-            return 0 if self.queues[0] <= self.queues[1] else 1
-        else:
-            raise ValueError("Invalid strategy")
-
-    def run(self):
-        """Run the simulation and calculate performance metrics."""
-        # Schedule the first arrival event
-        heapq.heappush(self.event_queue, (random.expovariate(self.arrival_rate), "arrival"))
-
-        # Process events until the simulation time is reached
-        while self.event_queue:
-            event_time, event_type = heapq.heappop(self.event_queue)
-            if event_time > self.simulation_time:
-                break
-            self.current_time = event_time
-
-            if event_type == "arrival":
-                # Handle an arrival event
-                self.total_arrivals += 1
-
-                # Select a queue for the packet
-                queue_index = self.select_queue()
-
-                if self.queues[queue_index] >= self.max_queue_size:
-                    # Packet is blocked
-                    self.blocked_packets += 1
-                else:
-                    # Add the packet to the queue
-                    self.queues[queue_index] += 1
-
-                    # Update the total queue length for this queue
-                    self.total_queue_length[queue_index] += self.queues[queue_index]
-
-                    # Schedule a departure event for this packet
-                    service_time = random.expovariate(self.service_rate)
-                    departure_time = self.current_time + service_time
-                    heapq.heappush(self.event_queue, (departure_time, f"departure_{queue_index}"))
-
-                # Schedule the next arrival event
-                next_arrival_time = self.current_time + random.expovariate(self.arrival_rate)
-                heapq.heappush(self.event_queue, (next_arrival_time, "arrival"))
-
-            elif event_type.startswith("departure"):
-                # Handle a departure event
-                queue_index = int(event_type.split("_")[1])
-                if self.queues[queue_index] > 0:
-                    self.queues[queue_index] -= 1
-                    self.total_served_packets += 1
-                    self.total_sojourn_time += self.current_time
-
-        # Calculate performance metrics
-        blocking_probability = self.blocked_packets / self.total_arrivals if self.total_arrivals > 0 else 0
-        average_queue_length = sum(self.total_queue_length) / self.simulation_time
-        average_sojourn_time = self.total_sojourn_time / self.total_served_packets if self.total_served_packets > 0 else 0
-
-        # Return the calculated metrics
-        return {
-            "blocking_probability": blocking_probability,
-            "average_queue_length": average_queue_length,
-            "average_sojourn_time": average_sojourn_time,
-        }
+#Simulations run in a background process pool; finished replications come
+#back through a thread-safe queue that the Tk main loop polls, so the window
+#never blocks and each λ point is drawn as soon as its replications are in.
+#Slider moves show the precomputed response surface's value at once, and a
+#background thread refines the surface around the current point on its own
+#small pool, so refinement keeps up while a λ sweep fills the main one.
+#tkinter and the Tk matplotlib backend are imported when the window is
+#created, so importing this module (as the spawned pool workers do when it
+#is run as a script) stays headless and cheap.
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from queue_simulation import summarize_replications
+from response_surface import load_surface
+from sweep import STRATEGIES, plan_sweep, run_task
+
+
+POLL_MS = 50        # how often the main loop drains finished results
+RESTART_MS = 300    # slider debounce before a cancelled run is restarted
+
+PLOTTED_METRICS = (
+    ('blocking_probability', "Blocking Probability"),
+    ('average_queue_length', "Average Queue Length"),
+    ('average_sojourn_time', "Average Sojourn Time")
+)
+LINE_STYLES = {'random': '-o', 'min_queue': '--s'}
+
+# Set by _load_toolkit() on first use
+tk = None
+Figure = None
+FigureCanvasTkAgg = None
+
+
+def _load_toolkit():
+    """Import tkinter and the Tk matplotlib backend on first use."""
+    global tk, Figure, FigureCanvasTkAgg
+    if tk is None:
+        import tkinter
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg as canvas_class
+        from matplotlib.figure import Figure as figure_class
+        tk, Figure, FigureCanvasTkAgg = tkinter, figure_class, canvas_class
 
 
 class DynamicInputGUI:
     """GUI for dynamically adjusting inputs and monitoring performance metrics."""
 
-    def __init__(self, root):
+    def __init__(self, root, num_runs=10, num_packets=10000, workers=None):
         # Initialize the GUI
+        _load_toolkit()
         self.root = root
         self.root.title("Dynamic Input GUI for Two-Queue System")
 
         # Default parameters
         self.arrival_rate = 1.0
         self.service_rate = 1.0
+        self.num_runs = num_runs
+        self.num_packets = num_packets
+        self.sweep_rates = np.round(np.linspace(0.5, 10.0, 20), 10)
+
+        # Worker pool and the queue its results come back on. Only the Tk
+        # thread touches widgets; pool callbacks just put onto the queue.
+        # 'spawn' keeps the workers free of the parent's Tk state.
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        self.results = queue.Queue()
+        self.generation = 0       # bumped for every new run; older results are ignored
+        self.futures = []
+        self.rows = defaultdict(list)   # (λ, strategy) -> replication rows of the current run
+        self.points = {strategy: {} for strategy in STRATEGIES}  # λ -> metrics
+        self.run_requested = False
+        self.restart_job = None
+        self.started = 0.0
+
+        # Response surface for instant estimates (None until built with `python main.py surface`)
+        self.surface = load_surface()
+        self.surface_updates = queue.Queue()
+        self.refine_thread = None
+        self.refine_executor = None   # created with the first refinement
+        self.closing = False
 
         # Create the plot
-        self.figure = Figure(figsize=(8, 6), dpi=100)
-        self.ax = self.figure.add_subplot(111)
+        self.figure = Figure(figsize=(12, 4.5), dpi=100, layout='constrained')
+        self.axes = [self.figure.add_subplot(1, 3, i + 1) for i in range(len(PLOTTED_METRICS))]
+        self.markers = []
         self.canvas = FigureCanvasTkAgg(self.figure, master=self.root)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
@@ -150,9 +124,24 @@ class DynamicInputGUI:
         self.run_button = tk.Button(self.root, text="Run Simulation", command=self.run_simulation)
         self.run_button.pack(side=tk.LEFT, padx=10, pady=10)
 
+        self.cancel_button = tk.Button(self.root, text="Cancel", command=self.cancel_run)
+        self.cancel_button.pack(side=tk.LEFT, padx=10, pady=10)
+
         self.clear_button = tk.Button(self.root, text="Clear Plot", command=self.clear_plot)
         self.clear_button.pack(side=tk.LEFT, padx=10, pady=10)
 
+        self.status_label = tk.Label(self.root, text="Idle", anchor=tk.W)
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+
+        # Instant estimate at the slider values
+        self.estimate_label = tk.Label(self.root, justify=tk.LEFT, font=("Courier", 10))
+        self.estimate_label.pack(side=tk.RIGHT, padx=10)
+
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        self.draw_plot()
+        self.update_estimate()
+        self.root.after(POLL_MS, self.poll_results)
+
     def calculate_traffic_load(self):
         """Calculate the traffic load ρ = λ / (2μ)."""
         return self.arrival_rate / (2 * self.service_rate) if self.service_rate > 0 else float('inf')
@@ -161,81 +150,191 @@ class DynamicInputGUI:
         """Update the arrival rate from the slider."""
         self.arrival_rate = float(value)
         self.update_traffic_load()
+        self.update_estimate()
+        # Only the λ marker moves; the sweep itself does not depend on λ
+        for marker in self.markers:
+            marker.set_xdata([self.arrival_rate, self.arrival_rate])
+        self.canvas.draw_idle()
 
     def update_service_rate(self, value):
-        """Update the service rate from the slider."""
-        self.service_rate = float(value)
+        """Update the service rate from the slider; the sweep depends on μ, so restart it."""
+        service_rate = float(value)
+        if service_rate == self.service_rate:
+            return
+        self.service_rate = service_rate
         self.update_traffic_load()
+        self.update_estimate()
+        if self.run_requested:
+            self.cancel_run(keep_requested=True)
+            self.clear_points()
+            self.draw_plot()
+            if self.restart_job is not None:
+                self.root.after_cancel(self.restart_job)
+            self.restart_job = self.root.after(RESTART_MS, self.run_simulation)
 
     def update_traffic_load(self):
         """Update the traffic load display."""
         traffic_load = self.calculate_traffic_load()
         self.traffic_load_label.config(text=f"Traffic Load (ρ): {traffic_load:.2f}")
 
-    def run_simulation(self):
-        """Run the simulation and update the plot."""
+    def update_estimate(self):
+        """Show interpolated metrics at the slider values; refine the surface there if needed."""
+        if self.surface is None:
+            self.estimate_label.config(text="No response surface: run `python main.py surface`")
+            return
+        lines = [f"{'':10} {'Blocking':>16} {'Queue Len':>16} {'Sojourn':>16}"]
+        for strategy in STRATEGIES:
+            estimate = self.surface.lookup(self.arrival_rate, self.service_rate, strategy)
+            cells = [f"{estimate[m]:.3f} ± {estimate[f'{m}_uncertainty']:.3f}" for m, _ in PLOTTED_METRICS]
+            lines.append(f"{strategy:10} " + " ".join(f"{cell:>16}" for cell in cells))
+        self.estimate_label.config(text="\n".join(lines))
+
+        if self.refine_thread is None or not self.refine_thread.is_alive():
+            if any(self.surface.needs_refinement(self.arrival_rate, self.service_rate, strategy)
+                   for strategy in STRATEGIES):
+                if self.refine_executor is None:
+                    # Separate from the sweep pool, whose queue can hold hundreds of tasks;
+                    # a quarter of the cores is enough for the few points of one refinement
+                    self.refine_executor = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 1) // 4),
+                                                               mp_context=multiprocessing.get_context('spawn'))
+                self.refine_thread = threading.Thread(target=self.refine_surface, daemon=True)
+                self.refine_thread.start()
+
+    def refine_surface(self):
+        """Background thread: split surface cells around the latest slider point until none need it."""
         try:
-            # Example data for plotting
-            arrival_rates = [i * 0.1 for i in range(1, 11)]
-            blocking_probabilities = []
-            average_queue_lengths = []
-            average_sojourn_times = []
-
-            # Run simulations for each arrival rate
-            for arrival_rate in arrival_rates:
-                simulation = TwoQueueSimulation(
-                    arrival_rate=arrival_rate,
-                    service_rate=self.service_rate,
-                    strategy="random",  # Change to "min-queue" if needed
-                    simulation_time=10000,
-                    max_queue_size=10,
-                )
-                results = simulation.run()
-                blocking_probabilities.append(results["blocking_probability"])
-                average_queue_lengths.append(results["average_queue_length"])
-                average_sojourn_times.append(results["average_sojourn_time"])
-
-            # Update the plot with the results
-            self.update_plot(arrival_rates, blocking_probabilities, average_queue_lengths, average_sojourn_times)
-        except Exception as e:
-            messagebox.showerror("Simulation Error", f"An error occurred while running the simulation: {e}")
-            print(f"Error in run_simulation: {e}")
-
-    def update_plot(self, x_data, y1_data, y2_data, y3_data):
-        """Update the plot with new data."""
+            refined = True
+            while refined:
+                refined = False
+                for strategy in STRATEGIES:
+                    # Re-read the sliders each time so refinement follows the user
+                    if self.surface.refine(self.arrival_rate, self.service_rate, strategy,
+                                           executor=self.refine_executor):
+                        refined = True
+                        self.surface_updates.put(strategy)
+            self.surface.save()
+        except Exception as e:  # pool shut down while closing, or a failed simulation
+            if not self.closing:
+                print(f"Surface refinement stopped: {e!r}")
+
+    def run_simulation(self):
+        """Start a λ sweep at the current μ for both strategies in the worker pool."""
+        self.restart_job = None
+        self.cancel_run(keep_requested=True)
+        self.clear_points()
+        self.run_requested = True
+        self.generation += 1
+        generation = self.generation
+
+        tasks = plan_sweep([(arrival_rate, self.service_rate) for arrival_rate in self.sweep_rates],
+                           num_runs=self.num_runs, num_packets=self.num_packets)
+        for task in tasks:
+            future = self.executor.submit(run_task, task)
+            # Runs on a pool thread: only hand the result to the Tk thread
+            future.add_done_callback(lambda f, task=task: self.results.put((generation, task, f)))
+            self.futures.append(future)
+        self.started = time.perf_counter()
+        self.update_status()
+        self.draw_plot()
+
+    def cancel_run(self, keep_requested=False):
+        """Cancel queued tasks of the current run; results already in flight are ignored."""
+        for future in self.futures:
+            future.cancel()
+        self.futures = []
+        self.generation += 1
+        self.run_requested = self.run_requested and keep_requested
+        if not keep_requested:
+            self.status_label.config(text="Cancelled")
+
+    def poll_results(self):
+        """Drain finished tasks from the worker queue and redraw any completed λ points."""
+        changed = False
         try:
-            self.ax.clear()
-            self.ax.plot(x_data, y1_data, label="Blocking Probability", marker='o')
-            self.ax.plot(x_data, y2_data, label="Average Queue Length", marker='x')
-            self.ax.plot(x_data, y3_data, label="Average Sojourn Time", marker='s')
-            self.ax.set_title("Simulation Results")
-            self.ax.set_xlabel("Arrival Rate")
-            self.ax.set_ylabel("Metrics")
-            self.ax.legend()
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Plot Error", f"An error occurred while updating the plot: {e}")
-            print(f"Error in update_plot: {e}")
+            while True:
+                generation, task, future = self.results.get_nowait()
+                if generation != self.generation or future.cancelled():
+                    continue
+                error = future.exception()
+                if error is not None:
+                    self.cancel_run()
+                    self.status_label.config(text=f"Simulation error: {error}")
+                    continue
+                key = (task.arrival_rate, task.strategy)
+                self.rows[key].append(future.result())
+                if len(self.rows[key]) == self.num_runs:
+                    self.points[task.strategy][task.arrival_rate] = summarize_replications(self.rows.pop(key))
+                    changed = True
+        except queue.Empty:
+            pass
+
+        if changed:
+            self.update_status()
+            self.draw_plot()
+
+        refined = False
+        while not self.surface_updates.empty():
+            self.surface_updates.get_nowait()
+            refined = True
+        if refined:
+            self.update_estimate()
+        self.root.after(POLL_MS, self.poll_results)
+
+    def update_status(self):
+        """Show sweep progress and elapsed time."""
+        total = len(self.sweep_rates) * len(STRATEGIES)
+        done = sum(len(points) for points in self.points.values())
+        elapsed = time.perf_counter() - self.started
+        state = "Done" if done == total else "Running"
+        self.status_label.config(text=f"{state}: {done}/{total} points, {elapsed:.1f} s")
+
+    def draw_plot(self):
+        """Redraw every metric for the points finished so far."""
+        self.markers = []
+        for ax, (metric, title) in zip(self.axes, PLOTTED_METRICS):
+            ax.clear()
+            for strategy in STRATEGIES:
+                points = sorted(self.points[strategy].items())
+                if points:
+                    ax.plot([x for x, _ in points], [m[metric] for _, m in points],
+                            LINE_STYLES[strategy], label=strategy, markersize=4)
+            self.markers.append(ax.axvline(self.arrival_rate, color='gray', linewidth=0.8))
+            ax.set_title(title)
+            ax.set_xlabel("Arrival Rate (λ)")
+            ax.set_xlim(0, self.sweep_rates[-1] + 0.5)
+        if any(self.points.values()):
+            self.axes[0].legend()
+        self.figure.suptitle(f"μ = {self.service_rate:.1f}")
+        self.canvas.draw_idle()
+
+    def clear_points(self):
+        self.rows.clear()
+        self.points = {strategy: {} for strategy in STRATEGIES}
 
     def clear_plot(self):
         """Clear the plot."""
-        try:
-            self.ax.clear()
-            self.ax.set_title("Simulation Results")
-            self.ax.set_xlabel("Arrival Rate")
-            self.ax.set_ylabel("Metrics")
-            self.canvas.draw()
-        except Exception as e:
-            messagebox.showerror("Clear Plot Error", f"An error occurred while clearing the plot: {e}")
-            print(f"Error in clear_plot: {e}")
+        self.cancel_run()
+        self.clear_points()
+        self.status_label.config(text="Idle")
+        self.draw_plot()
+
+    def close(self):
+        """Stop the worker pool and close the window."""
+        self.closing = True
+        self.cancel_run()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.refine_executor is not None:
+            self.refine_executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
 
 
 def main():
     """Entry point for the Dynamic Input GUI."""
+    _load_toolkit()
     root = tk.Tk()
     app = DynamicInputGUI(root)
     root.mainloop()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,144 @@
+#Constant-memory streaming statistics for long simulation runs.
+#QuantileSketch estimates sojourn-time percentiles with bounded relative
+#error, OccupancyStats accumulates time-weighted queue-length histograms.
+#Both merge, so replications run in parallel can be combined afterwards.
+
+import math
+
+import numpy as np
+
+
+class QuantileSketch:
+    # Log-bucketed quantile sketch (DDSketch style).
+    # Any reported quantile is within relative_accuracy of a true sample value,
+    # and memory grows only with log(max / min) of the observed values.
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0.0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        buckets = self.buckets
+        buckets[index] = buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        # Fold another sketch with the same accuracy into this one
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def quantile(self, q):
+        # Estimated q-quantile (0 <= q <= 1); 0 for an empty sketch
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint of the bucket (gamma^(i-1), gamma^i] in relative terms
+                return 2 * self.gamma ** index / (1 + self.gamma)
+        return 2 * self.gamma ** max(self.buckets) / (1 + self.gamma)
+
+    def __getstate__(self):
+        # Ship buckets as two compact arrays instead of a dict
+        indices = np.fromiter(self.buckets.keys(), dtype=np.int64, count=len(self.buckets))
+        counts = np.fromiter(self.buckets.values(), dtype=np.int64, count=len(self.buckets))
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'indices': indices,
+            'counts': counts,
+            'zero_count': self.zero_count,
+            'count': self.count
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state['relative_accuracy'])
+        self.buckets = dict(zip(state['indices'].tolist(), state['counts'].tolist()))
+        self.zero_count = state['zero_count']
+        self.count = state['count']
+
+
+class OccupancyStats:
+    # Time spent at each queue length, per queue
+
+    def __init__(self, num_queues=2, capacity=10):
+        # Plain nested lists keep the per-event update cheap
+        self._rows = [[0.0] * (capacity + 1) for _ in range(num_queues)]
+        self.last_time = 0.0
+
+    @property
+    def time_at_length(self):
+        # Total time at each length, shape (num_queues, capacity + 1)
+        return np.array(self._rows)
+
+    def advance(self, now, *lengths):
+        # Credit the time since the last event to the current queue lengths
+        dt = now - self.last_time
+        rows = self._rows
+        for queue_id, length in enumerate(lengths):
+            rows[queue_id][length] += dt
+        self.last_time = now
+
+    def histograms(self):
+        # Fraction of time each queue spent at each length, shape (num_queues, capacity + 1)
+        table = self.time_at_length
+        totals = table.sum(axis=1, keepdims=True)
+        return np.divide(table, totals, out=np.zeros_like(table), where=totals > 0)
+
+    def utilization(self):
+        # Fraction of time each server was busy
+        return 1.0 - self.histograms()[:, 0]
+
+    def merge(self, other):
+        self._rows = (np.array(self._rows) + np.array(other._rows)).tolist()
+        return self
+
+    def __getstate__(self):
+        return {'time_at_length': self.time_at_length, 'last_time': self.last_time}
+
+    def __setstate__(self, state):
+        self._rows = state['time_at_length'].tolist()
+        self.last_time = state['last_time']
+
+
+class StreamingStats:
+    # Sojourn-time sketch plus per-queue occupancy for one or more replications
+
+    def __init__(self, num_queues=2, capacity=10, relative_accuracy=0.01):
+        self.sojourn = QuantileSketch(relative_accuracy)
+        self.occupancy = OccupancyStats(num_queues, capacity)
+
+    def merge(self, other):
+        self.sojourn.merge(other.sojourn)
+        self.occupancy.merge(other.occupancy)
+        return self
+
+    def metrics(self):
+        # Tail and occupancy entries added to the metrics dict
+        utilization = self.occupancy.utilization()
+        histograms = self.occupancy.histograms()
+        metrics = {
+            'sojourn_time_p50': self.sojourn.quantile(0.50),
+            'sojourn_time_p95': self.sojourn.quantile(0.95),
+            'sojourn_time_p99': self.sojourn.quantile(0.99)
+        }
+        for queue_id in range(len(utilization)):
+            metrics[f'queue{queue_id + 1}_utilization'] = float(utilization[queue_id])
+            metrics[f'queue{queue_id + 1}_occupancy'] = histograms[queue_id]
+        return metrics
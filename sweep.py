@@ -0,0 +1,303 @@
+#Sweep planner for the Task 1 plots.
+#Turns the three parameter sweeps into one deduplicated grid of replication
+#tasks, runs the grid across cores, and serves per-point metrics to plotting.
+#Results can be saved as a CSV artifact so figures are rendered without simulating.
+
+import csv
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from queue_simulation import (ENGINE_VERSION, METRIC_FIELDS, engine_class, executor_capacity, replication_seed,
+                              summarize_replications)
+from result_cache import resolve_cache
+
+
+STRATEGIES = ('random', 'min_queue')
+
+# One replication at one parameter point. seed is (base_seed, replication index).
+SweepTask = namedtuple('SweepTask', 'arrival_rate service_rate strategy seed num_packets capacity')
+
+
+def _canonical(rate):
+    # Round rates so grids computed different ways (e.g. 2*ρ vs linspace) share points
+    return round(float(rate), 10)
+
+
+def arrival_rate_sweep(service_rate=1.0):
+    # λ from 0.2 to 1.8 at fixed μ; returns (x values, [(λ, μ), ...])
+    arrival_rates = np.linspace(0.2, 1.8, 9)
+    return arrival_rates, [(lam, service_rate) for lam in arrival_rates]
+
+
+def service_rate_sweep(arrival_rate=1.0):
+    # μ from 0.3 to 2.0 at fixed λ
+    service_rates = np.linspace(0.3, 2.0, 9)
+    return service_rates, [(arrival_rate, mu) for mu in service_rates]
+
+
+def traffic_load_sweep(service_rate=1.0):
+    # ρ from 0.1 to 0.9 at fixed μ, with λ = 2ρμ
+    traffic_loads = np.linspace(0.1, 0.9, 9)
+    return traffic_loads, [(rho * 2 * service_rate, service_rate) for rho in traffic_loads]
+
+
+def default_points():
+    # Every (λ, μ) point needed by generate_all_plots
+    points = []
+    for sweep in (arrival_rate_sweep(1.0), service_rate_sweep(1.0), traffic_load_sweep(1.0)):
+        points.extend(sweep[1])
+    return points
+
+
+def plan_sweep(points, num_runs=10, num_packets=10000, capacity=10, strategies=STRATEGIES, base_seed=0):
+    # Build the deduplicated task list for the given (λ, μ) points, in first-seen order
+    tasks = {}
+    for arrival_rate, service_rate in points:
+        for strategy in strategies:
+            for index in range(num_runs):
+                task = SweepTask(_canonical(arrival_rate), _canonical(service_rate), strategy,
+                                 (base_seed, index), num_packets, capacity)
+                tasks.setdefault(task, None)
+    return list(tasks)
+
+
+# Engine run_task uses when none is given. main.py --profile switches it to
+# 'event' and sets INSTRUMENTATION (an instrumentation.EngineInstrumentation
+# shared by in-process event-engine tasks), so profiles see the heap, variate
+# generation and select_queue rather than the compiled kernel. All engines
+# give identical rows, so this never changes results.
+DEFAULT_ENGINE = 'auto'
+INSTRUMENTATION = None
+
+
+def run_task(task, engine=None):
+    # Run one replication and return its METRIC_FIELDS row
+    engine = engine or DEFAULT_ENGINE
+    options = {'instrument': INSTRUMENTATION} if INSTRUMENTATION is not None and engine == 'event' else {}
+    sim = engine_class(engine)(
+        arrival_rate=task.arrival_rate,
+        service_rate=task.service_rate,
+        strategy=task.strategy,
+        seed=replication_seed(*task.seed),
+        queue_capacity=task.capacity,
+        **options
+    )
+    metrics = sim.run(num_packets=task.num_packets)
+    return np.array([metrics[field] for field in METRIC_FIELDS])
+
+
+class SweepResults:
+    # Per-replication rows of an executed plan, looked up by parameter point
+
+    def __init__(self, tasks, rows):
+        self.rows = {}
+        self._by_point = {}
+        for task, row in zip(tasks, rows):
+            self.rows[task] = row
+            self._by_point.setdefault(task[:3], []).append((task.seed, row))
+
+    def replications(self, arrival_rate, service_rate, strategy):
+        # All replication rows for one point, ordered by seed
+        key = (_canonical(arrival_rate), _canonical(service_rate), strategy)
+        if key not in self._by_point:
+            raise KeyError(f"No results for λ={arrival_rate}, μ={service_rate}, strategy={strategy}")
+        return np.array([row for _, row in sorted(self._by_point[key], key=lambda item: item[0])])
+
+    def metrics(self, arrival_rate, service_rate, strategy):
+        # Same dict as run_multiple_simulations for one point
+        return summarize_replications(self.replications(arrival_rate, service_rate, strategy))
+
+
+def _cache_key(cache, task):
+    base_seed, _ = task.seed
+    return cache.key(ENGINE_VERSION, task.arrival_rate, task.service_rate, task.strategy,
+                     task.capacity, task.num_packets, base_seed)
+
+
+class Journal:
+    # Append-only checkpoint of finished replications, one JSON line each.
+    # Lines are flushed as they are written and fsynced every few seconds, and
+    # a torn last line from a killed process is ignored when reading back.
+
+    def __init__(self, path, sync_interval=5.0):
+        self.path = path
+        self.sync_interval = sync_interval
+        self._file = None
+        self._last_sync = time.monotonic()
+
+    def completed(self):
+        # Rows already journaled, by task
+        rows = {}
+        if not os.path.exists(self.path):
+            return rows
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                arrival_rate, service_rate, strategy, base_seed, index, num_packets, capacity = record['task']
+                task = SweepTask(arrival_rate, service_rate, strategy, (base_seed, index), num_packets, capacity)
+                rows[task] = np.array(record['row'])
+        return rows
+
+    def append(self, task, row):
+        if self._file is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a')
+        base_seed, index = task.seed
+        record = {'task': [task.arrival_rate, task.service_rate, task.strategy, base_seed, index,
+                           task.num_packets, task.capacity],
+                  'row': [float(v) for v in row]}
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            os.fsync(self._file.fileno())
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+
+def _run_tasks(tasks, workers, executor, progress, journal=None):
+    # Rows for tasks in order, inline or across a process pool
+    rows = []
+    if executor is None and workers <= 1:
+        for task in tasks:
+            rows.append(run_task(task))
+            if journal is not None:
+                journal.append(task, rows[-1])
+            if progress:
+                progress(len(rows), len(tasks))
+        return rows
+
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return _run_tasks(tasks, workers, pool, progress, journal)
+
+    # Chunks sized from the executor's own capacity; single tasks when it is unknown
+    capacity = executor_capacity(executor, workers)
+    chunksize = 1 if capacity is None else max(1, len(tasks) // (8 * max(capacity, 1)))
+    if journal is not None:
+        # Small chunks, so a killed job loses little finished work
+        chunksize = min(chunksize, 4)
+    for task, row in zip(tasks, executor.map(run_task, tasks, chunksize=chunksize)):
+        rows.append(row)
+        if journal is not None:
+            journal.append(task, row)
+        if progress:
+            progress(len(rows), len(tasks))
+    return rows
+
+
+def execute_plan(tasks, workers=None, executor=None, progress=None, cache=True, journal=None):
+
+    # Run every task, across a process pool when workers > 1.
+    # Tasks already in the result cache are not simulated again.
+    # progress(done, total) is called as tasks complete, counting only tasks
+    # that are simulated. With journal (a path), every finished replication
+    # is checkpointed there, and tasks already in the journal are not rerun,
+    # so an interrupted plan resumes where it stopped.
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    results = {}
+    cache = resolve_cache(cache)
+    if cache is not None:
+        loaded = {}
+        for task in tasks:
+            key = _cache_key(cache, task)
+            if key not in loaded:
+                loaded[key] = cache.load(key, METRIC_FIELDS)
+            row = loaded[key].get(task.seed[1])
+            if row is not None:
+                results[task] = row
+
+    if journal is not None:
+        journal = Journal(journal)
+        for task, row in journal.completed().items():
+            results.setdefault(task, row)
+
+    pending = [task for task in tasks if task not in results]
+    try:
+        rows = _run_tasks(pending, workers, executor, progress, journal) if pending else []
+    finally:
+        if journal is not None:
+            journal.close()
+    results.update(zip(pending, rows))
+
+    if cache is not None and pending:
+        groups = {}
+        for task, row in zip(pending, rows):
+            indices, group_rows = groups.setdefault(_cache_key(cache, task), ([], []))
+            indices.append(task.seed[1])
+            group_rows.append(row)
+        for key, (indices, group_rows) in groups.items():
+            cache.store(key, METRIC_FIELDS, indices, group_rows)
+
+    return SweepResults(tasks, [results[task] for task in tasks])
+
+
+# Sweep artifact: one CSV row per replication plus a JSON metadata file
+ARTIFACT_CSV = 'sweep.csv'
+ARTIFACT_METADATA = 'sweep.json'
+_TASK_COLUMNS = ('arrival_rate', 'service_rate', 'strategy', 'base_seed', 'replication', 'num_packets', 'capacity')
+
+
+def save_results(results, directory):
+    # Write results as <directory>/sweep.csv and sweep.json; returns the CSV path
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, ARTIFACT_CSV)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(_TASK_COLUMNS + METRIC_FIELDS)
+        for task, row in results.rows.items():
+            base_seed, replication = task.seed
+            # repr-exact floats, so a reloaded artifact renders identical figures
+            writer.writerow([repr(task.arrival_rate), repr(task.service_rate), task.strategy, base_seed,
+                             replication, task.num_packets, task.capacity] + [repr(float(v)) for v in row])
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    metadata = {
+        'engine_version': ENGINE_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'replications': len(results.rows),
+        'metric_fields': list(METRIC_FIELDS),
+        'sha256': digest
+    }
+    with open(os.path.join(directory, ARTIFACT_METADATA), 'w') as f:
+        json.dump(metadata, f, indent=2)
+    return path
+
+
+def load_results(directory):
+    # SweepResults from an artifact written by save_results, plus its metadata
+    with open(os.path.join(directory, ARTIFACT_METADATA)) as f:
+        metadata = json.load(f)
+    tasks = []
+    rows = []
+    with open(os.path.join(directory, ARTIFACT_CSV), newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        fields = header[len(_TASK_COLUMNS):]
+        for record in reader:
+            arrival_rate, service_rate, strategy, base_seed, replication, num_packets, capacity = \
+                record[:len(_TASK_COLUMNS)]
+            tasks.append(SweepTask(float(arrival_rate), float(service_rate), strategy,
+                                   (int(base_seed), int(replication)), int(num_packets), int(capacity)))
+            rows.append(np.array([float(v) for v in record[len(_TASK_COLUMNS):]]))
+    if tuple(fields) != METRIC_FIELDS:
+        raise ValueError(f"Artifact columns {fields} do not match METRIC_FIELDS")
+    return SweepResults(tasks, rows), metadata
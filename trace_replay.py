@@ -0,0 +1,106 @@
+#Trace-driven replay for TwoQueueSimulation.
+#Arrival timestamps and, optionally, per-packet service demands are
+#memory-mapped from disk and read a chunk at a time, so a multi-gigabyte
+#capture runs in constant memory. Demands are attached to packets when they
+#arrive, so every strategy replays exactly the same work.
+
+import numpy as np
+
+from queue_simulation import TwoQueueSimulation
+
+
+def open_column(source, dtype=np.float64):
+    # Read-only 1-D view of a column without loading it: a .npy file is
+    # memory-mapped through np.load, any other path is read as raw values
+    # of `dtype`, arrays are used as given
+    if not isinstance(source, (str, bytes)) and not hasattr(source, '__fspath__'):
+        return np.asarray(source)
+    if str(source).endswith('.npy'):
+        return np.load(source, mmap_mode='r')
+    return np.memmap(source, dtype=dtype, mode='r')
+
+
+class ChunkedColumn:
+    # Sequential reader over a memory-mapped column, one chunk in memory at a time
+
+    def __init__(self, column, chunk_size=1 << 16):
+        self.column = column
+        self.chunk_size = chunk_size
+        self.position = 0  # index of the first value in the current chunk
+        self._chunk = []
+        self._cursor = 0
+
+    def __len__(self):
+        return len(self.column)
+
+    def next(self):
+        # Next value in the column; IndexError past the end
+        i = self._cursor
+        if i == len(self._chunk):
+            self.position += len(self._chunk)
+            if self.position >= len(self.column):
+                raise IndexError("Trace exhausted")
+            self._chunk = np.asarray(self.column[self.position:self.position + self.chunk_size],
+                                     dtype=float).tolist()
+            i = 0
+        self._cursor = i + 1
+        return self._chunk[i]
+
+
+class ReplayTwoQueueSimulation(TwoQueueSimulation):
+    # TwoQueueSimulation whose arrivals come from a trace of timestamps.
+    # The clock starts at the first timestamp. With service_source, the n-th
+    # packet's service demand is the n-th value of that column (whether or
+    # not the packet is admitted); without it, demands are exponential with
+    # rate service_rate as usual. arrival_rate is the trace's mean rate.
+
+    def __init__(self, arrival_source, service_source=None, service_rate=1.0, strategy='random', seed=None,
+                 queue_capacity=10, chunk_size=1 << 16, track_distributions=False, trace=None):
+        arrivals = open_column(arrival_source)
+        if len(arrivals) == 0:
+            raise ValueError("Arrival trace is empty")
+        self.origin = float(arrivals[0])
+        span = float(arrivals[-1]) - self.origin
+        arrival_rate = (len(arrivals) - 1) / span if span > 0 else float('inf')
+
+        super().__init__(arrival_rate, service_rate, strategy=strategy, seed=seed,
+                         queue_capacity=queue_capacity, track_distributions=track_distributions, trace=trace)
+        self.arrivals = ChunkedColumn(arrivals, chunk_size)
+        self.demands = None
+        if service_source is not None:
+            demands = open_column(service_source)
+            if len(demands) < len(arrivals):
+                raise ValueError("Service trace is shorter than the arrival trace")
+            self.demands = ChunkedColumn(demands, chunk_size)
+
+    def generate_arrival_time(self):
+        # Next timestamp of the trace, relative to the first
+        arrival_time = self.arrivals.next() - self.origin
+        if arrival_time < self.current_time:
+            raise ValueError(f"Arrival timestamps are not sorted at packet {self.packets_offered}")
+        return arrival_time
+
+    def next_packet(self, packet_id):
+        packet = super().next_packet(packet_id)
+        if self.demands is not None:
+            packet.service_demand = self.demands.next()
+        return packet
+
+    def run(self, num_packets=None):
+        #Replay the first num_packets arrivals of the trace (all of them by default)
+        if num_packets is None or num_packets > len(self.arrivals):
+            num_packets = len(self.arrivals)
+        return super().run(num_packets=num_packets)
+
+
+def replay(arrival_source, service_source=None, service_rate=1.0, strategies=('random', 'min_queue'),
+           num_packets=None, seed=None, queue_capacity=10, chunk_size=1 << 16):
+    # Metrics of each strategy on the same trace; seed drives the random
+    # dispatch choices (and service demands when no service trace is given)
+    results = {}
+    for strategy in strategies:
+        sim = ReplayTwoQueueSimulation(arrival_source, service_source, service_rate=service_rate,
+                                       strategy=strategy, seed=seed, queue_capacity=queue_capacity,
+                                       chunk_size=chunk_size)
+        results[strategy] = sim.run(num_packets)
+    return results
@@ -0,0 +1,104 @@
+#Per-packet trace export for TwoQueueSimulation.
+#Departed and dropped packets are appended to a preallocated structured
+#buffer; each full chunk is split into columns and appended to one raw file
+#per field, so memory stays at one chunk and the trace on disk can be
+#memory-mapped column by column without loading it.
+
+import json
+import os
+
+import numpy as np
+
+
+TRACE_DTYPE = np.dtype([
+    ('packet_id', np.int64),
+    ('arrival_time', np.float64),
+    ('queue_assigned', np.int8),       # -1 for dropped packets
+    ('service_start_time', np.float64),  # -1 for dropped packets
+    ('departure_time', np.float64)       # -1 for dropped packets
+])
+
+_METADATA_FILE = 'trace.json'
+
+
+class TraceSink:
+    # Chunked columnar writer. Records appear in the order packets leave the
+    # system (departure or drop), so packet_id is not sorted.
+    #
+    # Layout of `directory`:
+    #   <field>.bin  - raw little-endian column, one value per packet
+    #   trace.json   - dtype of each column and the number of rows written
+
+    def __init__(self, directory, chunk_size=1 << 16):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.buffer = np.zeros(chunk_size, dtype=TRACE_DTYPE)
+        self.fill = 0
+        self.rows = 0
+        os.makedirs(directory, exist_ok=True)
+        # Truncate columns left over from an earlier trace in the same place
+        self._files = {name: open(os.path.join(directory, f'{name}.bin'), 'wb')
+                       for name in TRACE_DTYPE.names}
+        self._write_metadata()
+
+    def record(self, packet):
+        # Append one packet that has departed or been dropped
+        self.buffer[self.fill] = (packet.packet_id, packet.arrival_time, packet.queue_assigned,
+                                  packet.service_start_time, packet.departure_time)
+        self.fill += 1
+        if self.fill == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        # Write the buffered chunk to the column files
+        if self.fill:
+            chunk = self.buffer[:self.fill]
+            for name, handle in self._files.items():
+                chunk[name].astype(TRACE_DTYPE[name].newbyteorder('<'), copy=False).tofile(handle)
+                handle.flush()
+            self.rows += self.fill
+            self.fill = 0
+        self._write_metadata()
+
+    def close(self):
+        self.flush()
+        for handle in self._files.values():
+            handle.close()
+        self._files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _write_metadata(self):
+        metadata = {
+            'rows': self.rows,
+            'columns': {name: TRACE_DTYPE[name].newbyteorder('<').str for name in TRACE_DTYPE.names}
+        }
+        with open(os.path.join(self.directory, _METADATA_FILE), 'w') as f:
+            json.dump(metadata, f)
+
+
+def load_trace(directory, columns=None):
+    # Memory-mapped columns of a trace written by TraceSink, as a dict of
+    # read-only arrays; nothing is read from disk until it is indexed
+    with open(os.path.join(directory, _METADATA_FILE)) as f:
+        metadata = json.load(f)
+    rows = metadata['rows']
+    trace = {}
+    for name in columns or metadata['columns']:
+        dtype = np.dtype(metadata['columns'][name])
+        path = os.path.join(directory, f'{name}.bin')
+        if rows == 0:
+            trace[name] = np.zeros(0, dtype=dtype)
+        else:
+            trace[name] = np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+    return trace
+
+
+def trace_dataframe(directory, columns=None):
+    # The trace as a pandas DataFrame (loads the selected columns into memory)
+    import pandas as pd
+    return pd.DataFrame({name: np.asarray(values) for name, values in load_trace(directory, columns).items()})